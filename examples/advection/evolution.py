@@ -2,14 +2,14 @@ from advection import *
 from ncviewer import NcView
 from initial_conditions import *
 
-x0 = -1
-xf = 101
-nx = 10200
+x0 = -5
+xf = 5
+nx = 1000
 T = 1001
 a = 1
 cfl = 0.8
 
-filepath = cir(x0, xf, nx, T, cfl, a, bumping(1, 8), sns=1250)
+filepath = cir(x0, xf, nx, T, cfl, a, bumping(1, 8), sns=1250, engine="fft", boundary="periodic")
 
 ncv = NcView(filepath)
 ncv.evolution(0)
@@ -1,6 +1,7 @@
 from advection import *
 from ncviewer import NcView
 from initial_conditions import *
+import shutil
 import os
 
 x0 = -1
@@ -10,61 +11,62 @@ T = 1
 a = 1
 cfl = 0.8
 
-ic = bumping(1, 8)
+# The sweep starts worker processes, which import this script again under spawn
+if __name__ == "__main__":
+    ic = bumping(1, 8)
 
-exact_ncf = method_of_characteristics(-0.5, 1, 1500, T, 200, a, ic)
+    exact_ncf = method_of_characteristics(-0.5, 1, 1500, T, 200, a, ic)
 
-cir_ncf = cir(x0, xf, nx, T, cfl, a, ic)
+    # Closures can not be sent to the worker processes, so the sweep gets the ("name", args) spec
+    manifest = sweep([cir, lax_friedrichs, lax_wendroff, beam_warming], [cfl], [nx], [a], [("bumping", (1, 8))], x0, xf, T)
 
-lf_ncf = lax_friedrichs(x0, xf, nx, T, cfl, a, ic)
+    cir_ncf, lf_ncf, lw_ncf, bw_ncf = [run["path"] for run in manifest]
 
-lw_ncf = lax_wendroff(x0, xf, nx, T, cfl, a, ic)
+    # Last snapshot of every run, t = T
+    iterPos = -1
 
-bw_ncf = beam_warming(x0, xf, nx, T, cfl, a, ic)
+    framesList = [{"ncfile_path": cir_ncf,
+                   "iterPos": iterPos,
+                   "varName": "u",
+                   "dimName": "x",
+                   "iterName": "t",
+                   "varNameInPlot" : "CIR",
+                   "line_mode": "markers", 
+                   "line_color": "blue"},
 
-iterPos = 400
+                   {"ncfile_path": lf_ncf,
+                   "iterPos": iterPos,
+                   "varName": "u",
+                   "dimName": "x",
+                   "iterName": "t",
+                   "varNameInPlot" : "Lax-Friedichs",
+                   "line_mode": "markers", 
+                   "line_color": "yellow"},
 
-framesList = [{"ncfile_path": cir_ncf,
-               "iterPos": iterPos,
-               "varName": "u",
-               "dimName": "x",
-               "iterName": "t",
-               "varNameInPlot" : "CIR",
-               "line_mode": "markers", 
-               "line_color": "blue"},
+                   {"ncfile_path": lw_ncf,
+                   "iterPos": iterPos,
+                   "varName": "u",
+                   "dimName": "x",
+                   "iterName": "t",
+                   "varNameInPlot" : "Lax-Wendroff",
+                   "line_mode": "markers", 
+                   "line_color": "brown"},
 
-               {"ncfile_path": lf_ncf,
-               "iterPos": iterPos,
-               "varName": "u",
-               "dimName": "x",
-               "iterName": "t",
-               "varNameInPlot" : "Lax-Friedichs",
-               "line_mode": "markers", 
-               "line_color": "yellow"},
+                   {"ncfile_path": bw_ncf,
+                   "iterPos": iterPos,
+                   "varName": "u",
+                   "dimName": "x",
+                   "iterName": "t",
+                   "varNameInPlot" : "Beam-Warmming",
+                   "line_mode": "markers", 
+                   "line_color": "purple"}
+                   ]
 
-               {"ncfile_path": lw_ncf,
-               "iterPos": iterPos,
-               "varName": "u",
-               "dimName": "x",
-               "iterName": "t",
-               "varNameInPlot" : "Lax-Wendroff",
-               "line_mode": "markers", 
-               "line_color": "brown"},
+    ncv = NcView(exact_ncf)
+    ncv.frameComparison(-1, 0, 1, framesList, line_color='black', line_mode='lines')
 
-               {"ncfile_path": bw_ncf,
-               "iterPos": iterPos,
-               "varName": "u",
-               "dimName": "x",
-               "iterName": "t",
-               "varNameInPlot" : "Beam-Warmming",
-               "line_mode": "markers", 
-               "line_color": "purple"}
-               ]
+    # Every sweep run has its own directory
+    for run in manifest:
+        shutil.rmtree(os.path.dirname(run["path"]))
 
-ncv = NcView(exact_ncf)
-ncv.frameComparison(100, 0, 1, framesList, line_color='black', line_mode='lines')
-
-for frame in framesList:
-    os.remove(frame["ncfile_path"])
-
-ncv.close(remove=True)
+    ncv.close(remove=True)
@@ -0,0 +1,16 @@
+from burgers import godunov
+from ncviewer import NcView
+from initial_conditions import *
+
+x0 = -6
+xf = 6
+nx = 1200
+T = 10
+cfl = 0.9
+
+filepath = godunov(x0, xf, nx, T, cfl, f1, sns=10)
+
+ncv = NcView(filepath)
+ncv.evolution(0, line_mode='lines')
+
+ncv.close(remove=True)
@@ -1,12 +1,21 @@
 import numpy as np
-from ncfiles import NcFile
-from scipy.sparse import diags
+import initial_conditions
+from ncfiles import open_output, output_summary
+from time_integration import SSPRK
+import profiling
+from scipy.sparse import diags, coo_matrix, kron
+# Sparse product y += A x into a given output, scipy has no public out= for it
+from scipy.sparse._sparsetools import csr_matvec
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+import time
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
-def method_of_characteristics(x0:float, xf:float, nx:int, T:float, nt:int, a:float, f, sns:int = 1, path_to_save="simulations"):
+def method_of_characteristics(x0:float, xf:float, nx:int, T:float, nt:int, a:float, f, sns:int = 1, path_to_save="simulations", asynchronous:bool = False, backend:str = "netcdf", times = None, block_bytes:int = 2**25, layout:dict = None):
     """
     Solves the advection 1D equation using the method of characteristics and saves the results.
 
@@ -39,77 +48,102 @@ def method_of_characteristics(x0:float, xf:float, nx:int, T:float, nt:int, a:flo
     path_to_save : str
         path to save the simulation. Name will be advection-exact
 
+    asynchronous : bool
+        Write the snapshots from a background thread.
+
+    backend : str
+        Output store: "netcdf", "npy" (memory-mapped .npy directory) or "memory".
+
+    layout : dict
+        Storage options of the variables passed to NcFile.addVars, e.g. {"time_first": True,
+        "zlib": True, "complevel": 4} for the time-major compressed layout. The "npy" and
+        "memory" backends ignore them.
+
+    times : array of float
+        Explicit output times. By default the saved times are dt * k for every
+        k multiple of sns, with dt = T / nt.
+
+    block_bytes : int
+        Memory bound of the (n_snapshots, nx) blocks evaluated and written at once.
+
     Returns:
     --------
     str
-        The file path where the simulation results are saved.
+        The file path where the simulation results are saved (the MemoryStore
+        for the "memory" backend).
     """
 
     x = np.linspace(x0, xf, nx)
     dt = T / nt
 
-    full_path = f"advection1D-exact.nc"
-    ncf = NcFile(full_path, title='Advection simulation by Method of Characteristics', description="Exact solution of advection by method of characteristics", author = os.getenv("AUTHOR"), institution = os.getenv("INSTITUTION"), source = os.getenv("REPO_URL"), references ='LeVeque, Randall J.: Numerical Methods for Conservation Laws 1992')
-    ncf.addCoords({"x": x})
-    ncf.addVars(['u'])
+    # Only the saved times are evaluated
+    if times is None:
+        times = dt * np.arange(0, nt + 1, sns)
+    times = np.atleast_1d(np.asarray(times, dtype=float))
+    block = max(1, block_bytes // (8 * nx))
 
-    for k in range(nt + 1):
-        t = dt * k
-        u = f(x - a * t)
-        if (k % sns == 0):
-            ncf.save(t, {"u": u})
+    full_path = os.path.join(path_to_save, "advection1D-exact")
+    with open_output(backend, full_path, len(times), title='Advection simulation by Method of Characteristics', description="Exact solution of advection by method of characteristics", author = os.getenv("AUTHOR"), institution = os.getenv("INSTITUTION"), source = os.getenv("REPO_URL"), references ='LeVeque, Randall J.: Numerical Methods for Conservation Laws 1992', asynchronous = asynchronous) as ncf:
+        ncf.addCoords({"x": x})
+        ncf.addVars(['u'], **(layout or {}))
 
-    print(f"Simulation finished, {full_path} generated, details:")
+        for start in range(0, len(times), block):
+            t = times[start:start + block]
+            u = f((x[None, :] - a * t[:, None]).ravel()).reshape(len(t), nx)
+            ncf.saveBlock(t, {"u": u})
+
+    full_path = ncf.filepath
+
+    print(f"Simulation finished, {output_summary(ncf)}, details:")
     print("Exact solution of advection by method of characteristics")
 
-    return full_path
+    return ncf if backend == "memory" else full_path
 
-def _matrix(a:float, nu, dim, method:str):
+def _coefficients(a:float, nu, method:str):
+    """
+    Stencil of the one step method as a list of (offset, coefficient) pairs,
+    where offset k multiplies u[j+k] in the update of u[j]. Offsets are sorted.
+    """
 
     if (method == "cir"):
         if (a > 0):
-            diag = (1 - nu) * np.ones(dim)
-            lower_diag = nu * np.ones(dim-1)
-            A = diags([diag, lower_diag], [0, -1], shape=(dim, dim), format='csr')
+            stencil = [(-1, nu), (0, 1 - nu)]
         else:
-            diag = (1 + nu) * np.ones(dim)
-            upper_diag = (-nu) * np.ones(dim-1)
-            A = diags([diag, upper_diag], [0, 1], shape=(dim, dim), format='csr')
+            stencil = [(0, 1 + nu), (1, -nu)]
 
     elif (method == "lax_friedichs"):
-        lower_diag = 0.5 * (1+nu) * np.ones(dim-1)
-        upper_diag = 0.5 * (1-nu) * np.ones(dim-1)
-        A = diags([lower_diag, upper_diag], [-1, 1], shape=(dim, dim), format='csr')
+        stencil = [(-1, 0.5 * (1+nu)), (1, 0.5 * (1-nu))]
 
     elif (method == "lax_wendroff"):
-        lower_diag = 0.5 * nu * (nu+1) * np.ones(dim-1)
-        diag = (1-nu*nu) * np.ones(dim)
-        upper_diag = 0.5 * nu * (nu-1) * np.ones(dim-1)
-        A = diags([lower_diag, diag, upper_diag], [-1, 0, 1], shape=(dim, dim), format='csr')
+        stencil = [(-1, 0.5 * nu * (nu+1)), (0, 1-nu*nu), (1, 0.5 * nu * (nu-1))]
 
     elif (method == "beam_warming"):
         if (a > 0):
-            lower_lower_diag = 0.5 * nu * (nu-1) * np.ones(dim-2)
-            lower_diag = nu * (2-nu) * np.ones(dim-1)
-            diag = 0.5 * (2-3*nu+nu*nu) * np.ones(dim)
-            A = diags([lower_lower_diag, lower_diag, diag], [-2, -1, 0], shape=(dim, dim), format='csr')
+            stencil = [(-2, 0.5 * nu * (nu-1)), (-1, nu * (2-nu)), (0, 0.5 * (2-3*nu+nu*nu))]
         else:
-            upper_upper_diag = 0.5 * (-nu) * ((-nu)-1) * np.ones(dim-2)
-            upper_diag = (-nu) * (2+nu) * np.ones(dim-1)
-            diag = 0.5 * (2+3*nu+nu*nu) * np.ones(dim)
-            A = diags([diag, upper_diag, upper_upper_diag], [0, 1, 2], shape=(dim, dim), format='csr')
+            stencil = [(0, 0.5 * (2+3*nu+nu*nu)), (1, (-nu) * (2+nu)), (2, 0.5 * (-nu) * ((-nu)-1))]
 
     elif (method == "fromm"):
         if (a > 0):
-            lower_lower_diag = (-0.25) * (1-nu) * nu * np.ones(dim-2)
-            lower_diag = 0.25 * (5-nu) * nu * np.ones(dim-1)
-            diag = 0.25 * (1-nu) * (4+nu) * np.ones(dim)
-            upper_diag = (-0.25) * (1-nu) *np.ones(dim-1)
-            A = diags([lower_lower_diag, lower_diag, diag, upper_diag], [-2, -1, 0, 1], shape=(dim, dim), format='csr')
+            stencil = [(-2, (-0.25) * (1-nu) * nu), (-1, 0.25 * (5-nu) * nu), (0, 0.25 * (1-nu) * (4+nu)), (1, (-0.25) * (1-nu) * nu)]
+        else:
+            stencil = [(-1, 0.25 * (1+nu) * nu), (0, 0.25 * (1+nu) * (4-nu)), (1, (-0.25) * (5+nu) * nu), (2, 0.25 * (1+nu) * nu)]
 
     else:
         raise RuntimeError("404 - Method Not Found")
-    
+
+    return stencil
+
+def _matrix(a:float, nu, dim, method:str, boundary:str = "dirichlet"):
+
+    stencil = _coefficients(a, nu, method)
+
+    # Periodic Conditions: circulant matrix, every diagonal wraps around
+    if (boundary == "periodic"):
+        diagonals = [(offset, coef) for offset, coef in stencil] + [(offset - np.sign(offset) * dim, coef) for offset, coef in stencil if offset != 0]
+        return diags([coef * np.ones(dim - abs(offset)) for offset, coef in diagonals], [offset for offset, _ in diagonals], shape=(dim, dim), format='csr')
+
+    A = diags([coef * np.ones(dim - abs(offset)) for offset, coef in stencil], [offset for offset, _ in stencil], shape=(dim, dim), format='csr')
 
     # Dirichlet Conditions
     A = A.tolil()
@@ -132,8 +166,278 @@ def _matrix(a:float, nu, dim, method:str):
 
     return A
 
+@lru_cache(maxsize=32)
+def _operator(method:str, sign:int, nu, dim, boundary:str = "dirichlet"):
+    """
+    One step of the method as a cached CSR matrix, keyed by (method, sign of a, nu, dim, boundary).
+
+    The copy u[1] = u[0] (u[-2] = u[-1] for a < 0) of Beam-Warming and Fromm is folded
+    into the matrix, so once u[0] and u[-1] hold their Dirichlet values every step is
+    the same linear map and `_boundary_conditions` leaves the result unchanged.
+    The returned matrix is shared between callers and must not be modified.
+    """
+    A = _matrix(sign, nu, dim, method, boundary)
+
+    if (boundary == "dirichlet" and (method == "beam_warming" or method == "fromm")):
+        A = A.tolil()
+        if (sign > 0):
+            A[1, :] = 0
+            A[1, 0] = 1
+        else:
+            A[-2, :] = 0
+            A[-2, -1] = 1
+        A = A.tocsr()
+
+    return A
+
+@lru_cache(maxsize=8)
+def _operator_power(method:str, sign:int, nu, dim, n:int, boundary:str = "dirichlet", tol:float = 1e-18):
+    """
+    Cached composed operator A^n of `_operator`, built by repeated squaring.
+
+    The bandwidth of A^n grows linearly with n, but the weights of the linear schemes
+    decay quickly away from the characteristic, so entries smaller than tol are dropped
+    after every product. Rows of A sum to one, so the dropped mass is far below the
+    rounding error of n single steps.
+    """
+    def prune(M):
+        M.data[np.abs(M.data) < tol] = 0
+        M.eliminate_zeros()
+        return M
+
+    B = _operator(method, sign, nu, dim, boundary)
+    P = None
+    while n:
+        if (n & 1):
+            P = B if P is None else prune(P @ B)
+        n >>= 1
+        if n:
+            B = prune(B @ B)
+
+    return P
+
+def _n_steps(t0:float, T:float, dt:float):
+    """
+    Number of iterations done by the time loop `while t < T: t = t0 + dt * k`.
+    """
+    if (t0 >= T):
+        return 0
+
+    k = max(1, int(np.ceil((T - t0) / dt)))
+    while (k > 1 and t0 + dt * (k - 1) >= T):
+        k -= 1
+    while (t0 + dt * k < T):
+        k += 1
+
+    return k
+
+def _stencil(a:float, nu, dim, method:str):
+    """
+    Offsets, coefficients and interior rows [lo, hi) of the one step method.
+
+    Rows outside [lo, hi) are the Dirichlet rows of `_matrix`, they keep their value.
+    """
+    stencil = _coefficients(a, nu, method)
+    offsets = [offset for offset, _ in stencil]
+    coefs = [coef for _, coef in stencil]
+
+    lo = max(1, -offsets[0])
+    hi = dim - max(1, offsets[-1])
+
+    return offsets, coefs, lo, hi
+
+# Flux limiters phi(theta) of the high resolution methods, written into out
+def _limiter_minmod(theta, out, tmp):
+    np.minimum(theta, 1, out=out)
+    np.maximum(out, 0, out=out)
+    return out
+
+def _limiter_superbee(theta, out, tmp):
+    np.multiply(theta, 2, out=out)
+    np.minimum(out, 1, out=out)
+    np.minimum(theta, 2, out=tmp)
+    np.maximum(out, tmp, out=out)
+    np.maximum(out, 0, out=out)
+    return out
+
+def _limiter_van_leer(theta, out, tmp):
+    np.abs(theta, out=tmp)
+    np.add(theta, tmp, out=out)
+    tmp += 1
+    out /= tmp
+    return out
+
+def _limiter_mc(theta, out, tmp):
+    np.add(theta, 1, out=out)
+    out *= 0.5
+    np.minimum(out, 2, out=out)
+    np.multiply(theta, 2, out=tmp)
+    np.minimum(out, tmp, out=out)
+    np.maximum(out, 0, out=out)
+    return out
+
+_LIMITERS = {
+    "minmod": _limiter_minmod,
+    "superbee": _limiter_superbee,
+    "van_leer": _limiter_van_leer,
+    "mc": _limiter_mc,
+}
+
+def _along(axis:int, start, stop):
+    """
+    Index of the slice [start:stop] along axis.
+    """
+    return (slice(None),) * axis + (slice(start, stop),)
+
+def _limited_stepper(a:float, nu, dim, method:str, u, axis:int = 0, boundary:str = "dirichlet"):
+    """
+    Stepper of the TVD flux limiter method: upwind flux plus the Lax-Wendroff
+    correction limited by phi(theta),
+
+        F[j+1/2] = nu * u[upwind] + 0.5 * |nu| * (1 - |nu|) * phi(theta[j+1/2]) * (u[j+1] - u[j])
+
+    with theta the ratio of the upwind jump to the local one. Interfaces without an
+    upwind jump fall back to the upwind flux. Updates u in place, rows 0 and dim-1 are
+    Dirichlet rows. The spatial axis of u is `axis`, any other axes (with their own nu
+    along the trailing one) are advanced together.
+
+    With periodic boundaries the step runs on a copy of u padded with two wrapped
+    ghost cells at each side.
+    """
+    at = lambda start, stop: _along(axis, start, stop)
+
+    if (boundary == "periodic"):
+        shape = list(u.shape)
+        shape[axis] += 4
+        P = np.empty(shape)
+        padded = _limited_stepper(a, nu, dim + 4, method, P, axis)
+
+        def step(u):
+            P[at(2, -2)] = u
+            P[at(None, 2)] = u[at(-2, None)]
+            P[at(-2, None)] = u[at(None, 2)]
+            padded(P)
+            u[...] = P[at(2, -2)]
+            return u
+
+        return step
+
+    limiter = _LIMITERS[method]
+    shape = u[at(1, None)].shape
+    D = np.empty(shape)
+    theta = np.empty(shape)
+    phi = np.empty(shape)
+    F = np.empty(shape)
+    tmp = np.empty(shape)
+    correction = 0.5 * np.abs(nu) * (1 - np.abs(nu))
+    positive = np.all(np.asarray(a) > 0)
+
+    def step(u):
+        np.subtract(u[at(1, None)], u[at(None, -1)], out=D)
+
+        # Upwind jump over local jump, any finite value where the local jump vanishes
+        theta.fill(0)
+        if (positive):
+            np.divide(D[at(None, -1)], D[at(1, None)], out=theta[at(1, None)], where=D[at(1, None)] != 0)
+            np.multiply(u[at(None, -1)], nu, out=F)
+        else:
+            np.divide(D[at(1, None)], D[at(None, -1)], out=theta[at(None, -1)], where=D[at(None, -1)] != 0)
+            np.multiply(u[at(1, None)], nu, out=F)
+        limiter(theta, phi, tmp)
+
+        np.multiply(phi, D, out=phi)
+        np.multiply(phi, correction, out=phi)
+        np.add(F, phi, out=F)
+
+        np.subtract(F[at(1, None)], F[at(None, -1)], out=tmp[at(None, -1)])
+        u[at(1, -1)] -= tmp[at(None, -1)]
+
+        return u
+
+    return step
+
+def _stencil_stepper(a:float, nu, dim, method:str, u, axis:int = 0, boundary:str = "dirichlet"):
+    """
+    Matrix-free version of `_iteration`. Returns a function that applies one step
+    of the method with vectorized slice updates into two preallocated buffers.
+
+    The spatial axis of u is `axis`, any other axes are advanced together.
+    The nonlinear flux limiter methods are delegated to `_limited_stepper`.
+    """
+    if (method in _LIMITERS):
+        return _limited_stepper(a, nu, dim, method, u, axis, boundary)
+
+    offsets, coefs, lo, hi = _stencil(a, nu, dim, method)
+    at = lambda start, stop: _along(axis, start, stop)
+    buffers = (np.empty(u.shape), np.empty(u.shape))
+
+    if (boundary == "periodic"):
+        tmp = np.empty(u.shape)
+
+        # out[j] += coef * u[(j + offset) % dim], as (destination, source) slice pairs split at the wrap
+        terms = []
+        for offset, coef in zip(offsets, coefs):
+            k = offset % dim
+            parts = [(at(0, dim - k), at(k, dim))]
+            if (k):
+                parts.append((at(dim - k, dim), at(0, k)))
+            terms.append((coef, parts))
+
+        def step(u):
+            out = buffers[1] if u is buffers[0] else buffers[0]
+
+            coef, parts = terms[0]
+            for dst, src in parts:
+                np.multiply(u[src], coef, out=out[dst])
+            for coef, parts in terms[1:]:
+                for dst, src in parts:
+                    np.multiply(u[src], coef, out=tmp[dst])
+                out += tmp
+
+            return out
+
+        return step
+
+    tmp = np.empty(u[at(lo, hi)].shape)
+
+    def step(u):
+        out = buffers[1] if u is buffers[0] else buffers[0]
+
+        # Dirichlet rows
+        out[at(None, lo)] = u[at(None, lo)]
+        out[at(hi, None)] = u[at(hi, None)]
+
+        interior = out[at(lo, hi)]
+        np.multiply(u[at(lo+offsets[0], hi+offsets[0])], coefs[0], out=interior)
+        for offset, coef in zip(offsets[1:], coefs[1:]):
+            np.multiply(u[at(lo+offset, hi+offset)], coef, out=tmp)
+            interior += tmp
+
+        return out
+
+    return step
+
+def _amplification(a:float, nu, dim, method:str):
+    """
+    Amplification factor g(theta) = sum coef * exp(i * offset * theta) of the linear
+    method with periodic boundaries, at the rfft frequencies theta = 2 pi m / dim.
+
+    The circulant step is diagonal in Fourier space, n steps multiply the rfft of
+    u by g(theta)^n.
+    """
+    theta = 2 * np.pi * np.fft.rfftfreq(dim)
+    g = np.zeros(theta.shape, dtype=complex)
+    for offset, coef in _coefficients(a, nu, method):
+        g += coef * np.exp(1j * offset * theta)
+
+    return g
+
 def _boundary_conditions(u, x0, xf, f, type:str, a:float, method:str):
 
+    # Periodic, the steppers and operators already wrap around
+    if (type == "periodic"):
+        return u
+
     # Dirichlet
     if (type == "dirichlet"):
             u[0] = f(x0)
@@ -147,19 +451,56 @@ def _boundary_conditions(u, x0, xf, f, type:str, a:float, method:str):
         
     return u
 
-def _iteration(a, nu, dim, method_name, u, iteration_type="iterative"):
+def _iteration(a, nu, dim, method_name, u, iteration_type="iterative", boundary="dirichlet"):
 
     if (a == 0):
         u = u
     else:
         if (iteration_type == "iterative"):
-            u = _matrix(a, nu, dim, method_name) @ u 
+            u = _operator(method_name, int(np.sign(a)), nu, dim, boundary) @ u 
         else:
             u
 
     return u
 
-def _one_step_method(method_name:str, x0:float, xf:float, nx:int, T:float, cfl:float, a:float, f, t0:float = 0, sns:int = 1,  path_to_save="simulations"):
+def _resume(ncf, run:dict, sns:int):
+    """
+    Step and state from which a run continues the reopened output ncf.
+
+    The run parameters must match the attributes stored by the interrupted run. The
+    state is the full precision checkpoint when there is one, otherwise the last
+    (f4) snapshot. The snapshots after that step are dropped, the run writes them again.
+
+    Returns:
+    --------
+    (int, array)
+        The step and the state, (0, None) when no snapshot was written yet.
+    """
+    stored = ncf.getAttrs()
+    missing = [name for name in run if name not in stored]
+    if (missing):
+        raise RuntimeError(f"Cannot resume {ncf.filepath} - no {', '.join(missing)} attributes, it was not written by this solver")
+
+    for name, value in run.items():
+        same = (stored[name] == value) if isinstance(value, str) else np.isclose(stored[name], value, rtol=1e-12, atol=0)
+        if (not same):
+            raise RuntimeError(f"Cannot resume {ncf.filepath} - stored {name} = {stored[name]} does not match {value}")
+
+    checkpoint = ncf.loadCheckpoint()
+    if (checkpoint is not None):
+        k, _, state = checkpoint
+    else:
+        n = ncf.snapshots()
+        if (n == 0):
+            return 0, None
+        k = (n - 1) * sns
+        _, state = ncf.loadSnapshot(n - 1)
+
+    ncf.rewind(k // sns + 1)
+
+    return k, state["u"]
+
+def _one_step_method(method_name:str, x0:float, xf:float, nx:int, T:float, cfl:float, a:float, f, t0:float = 0, sns:int = 1,  path_to_save="simulations", engine:str = "stencil", asynchronous:bool = False, backend:str = "netcdf", boundary:str = "dirichlet", profile = None, resume:bool = False, checkpoint:int = 0, layout:dict = None):
     """
     Solves the advection 1D equation using the cir method and saves the results.
 
@@ -175,7 +516,7 @@ def _one_step_method(method_name:str, x0:float, xf:float, nx:int, T:float, cfl:f
         The number of spatial grid points.
     
     T : float
-        The total simulation time.
+        The total simulation time, hit exactly by the last step.
 
     cfl : float
         Courant-Friedichs-Levy condition of the method.
@@ -201,17 +542,57 @@ def _one_step_method(method_name:str, x0:float, xf:float, nx:int, T:float, cfl:f
     path_to_save : str
         path to save the simulation. Name will be advection1D-<method>
 
+    engine : str
+        How each time step is applied:
+            "stencil": vectorized slice updates into preallocated buffers.
+            "matrix": sparse matrix-vector product with a cached operator.
+            "jump": one product per snapshot with the cached operator A^sns.
+            "fft": periodic linear methods only, every snapshot straight from the
+                   initial condition as g(theta)^k in Fourier space.
+
+    asynchronous : bool
+        Write the snapshots from a background thread while the solver keeps stepping.
+
+    backend : str
+        Output store: "netcdf", "npy" (memory-mapped .npy directory) or "memory".
+
+    layout : dict
+        Storage options of the variables passed to NcFile.addVars, e.g. {"time_first": True,
+        "zlib": True, "complevel": 4} for the time-major compressed layout. The "npy" and
+        "memory" backends ignore them.
+
+    boundary : str
+        "dirichlet" or "periodic". The periodic grid has nx points of spacing
+        (xf - x0) / nx, xf is identified with x0 and left out.
+
+    profile : bool or profiling.Stats
+        Time the phases assembly, step, boundary (non periodic) and save, and
+        checkpoint when checkpoints are written. Off by default, without any cost.
+
+    resume : bool
+        Continue an interrupted run from its output file (netcdf backend). The grid,
+        method, Courant number, dt, t0, T and sns must match the ones stored in the file.
+        The run starts from the last checkpoint, or from the last snapshot when there
+        is none, and appends the remaining snapshots. Without a file the run starts
+        from t0.
+
+    checkpoint : int
+        Write a full precision checkpoint of u every checkpoint snapshots (netcdf
+        backend), the snapshots themselves are stored in f4. 0 disables them.
+
     Returns:
     --------
     str
-        The file path where the simulation results are saved.
+        The file path where the simulation results are saved (the MemoryStore
+        for the "memory" backend), with the profiling.Stats as (result, stats)
+        when profiling.
     """
 
     if (x0 >= xf):
         raise RuntimeError("Imposible Domain - xf must be greater than x0")
     
     N = nx - 2
-    x = np.linspace(x0, xf, nx)
+    x = np.linspace(x0, xf, nx, endpoint=(boundary != "periodic"))
     dx = np.abs(xf - x0) / nx
     if (a == 0):
         dt = (T - t0)
@@ -222,7 +603,7 @@ def _one_step_method(method_name:str, x0:float, xf:float, nx:int, T:float, cfl:f
     nu = a * dt / dx
 
     # Info
-    info = f" Model: Advection / Method: {method_name} / Dimension: 1D / Mesh: [{x0}, {xf}] / dx: {dx} / Interval Time: [{t0}, {T}] / dt: {dt} / CFL: {cfl} / Courant Number: {nu} "
+    info = f" Model: Advection / Method: {method_name} / Dimension: 1D / Mesh: [{x0}, {xf}] / Boundary: {boundary} / dx: {dx} / Interval Time: [{t0}, {T}] / dt: {dt} / CFL: {cfl} / Courant Number: {nu} "
 
     # Initial Condition
     u0 = f(x)
@@ -230,44 +611,525 @@ def _one_step_method(method_name:str, x0:float, xf:float, nx:int, T:float, cfl:f
     if (not (0 <= cfl and  cfl <= 1)):
         raise RuntimeError("Unstable method - CFL condition not satisfied")
 
-    full_path = f"advection1D-{method_name}.nc"
-    ncf = NcFile(full_path, title=f'Advection simulation by method {method_name}', description=info, author = os.getenv("AUTHOR"), institution = os.getenv("INSTITUTION"), source = os.getenv("REPO_URL"), references ='LeVeque, Randall J.: Numerical Methods for Conservation Laws 1992')
-    ncf.addCoords({'x': x})
-    ncf.addVars(['u'])
+    if (engine not in ("stencil", "matrix", "jump", "fft")):
+        raise RuntimeError(f"Unknown engine '{engine}' - use 'stencil', 'matrix', 'jump' or 'fft'")
+
+    if (boundary not in ("dirichlet", "periodic")):
+        raise RuntimeError(f"Unknown boundary '{boundary}' - use 'dirichlet' or 'periodic'")
+
+    if (method_name in _LIMITERS and engine != "stencil"):
+        raise RuntimeError(f"Flux limiter method '{method_name}' is nonlinear - use engine 'stencil'")
+
+    if (engine == "fft" and boundary != "periodic"):
+        raise RuntimeError("FFT engine needs periodic boundaries")
+
+    if ((resume or checkpoint) and backend != "netcdf"):
+        raise RuntimeError("Resume and checkpoints need the 'netcdf' backend")
+
+    stats = profiling.stats_for(profile)
+
+    # Parameters a resumed run must share with the stored one
+    run = {"method": method_name, "x0": x0, "xf": xf, "nx": nx, "boundary": boundary, "nu": nu, "dt": dt, "t0": t0, "T": T, "sns": sns}
+
+    full_path = os.path.join(path_to_save, f"advection1D-{method_name}")
+    resumed = resume and os.path.exists(full_path + ".nc")
+    with open_output(backend, full_path, _n_steps(t0, T, dt) // sns + 1, title=f'Advection simulation by method {method_name}', description=info, author = os.getenv("AUTHOR"), institution = os.getenv("INSTITUTION"), source = os.getenv("REPO_URL"), references ='LeVeque, Randall J.: Numerical Methods for Conservation Laws 1992', asynchronous = asynchronous, **({"mode": 'a'} if resumed else {})) as ncf:
+        save = stats.wrap("save", ncf.save)
+        # Periodic boundaries leave u as it is, nothing to time
+        boundary_conditions = _boundary_conditions if boundary == "periodic" else stats.wrap("boundary", _boundary_conditions)
+
+        k0, u = _resume(ncf, run, sns) if resumed else (0, None)
+        if (u is None):
+            if (not resumed):
+                ncf.addCoords({'x': x})
+                ncf.addVars(['u'], **(layout or {}))
+                ncf.addAttrs(run)
+
+            # Save initial condition
+            save(t0, {"u": u0})
+            u = u0.copy()
+
+        # Timed only when checkpoints are written
+        save_checkpoint = stats.wrap("checkpoint", ncf.saveCheckpoint) if checkpoint else None
+        every = sns * checkpoint
+
+        # The last step is shortened to land exactly on T, with Courant number nu * (T - t) / dt
+        nk = _n_steps(t0, T, dt)
+        nu_last = nu * (T - (t0 + dt * (nk - 1))) / dt
+        short = (nk > 0 and a != 0 and not np.isclose(nu_last, nu, rtol=1e-12, atol=0))
+
+        with stats.phase("assembly"):
+            if (engine == "stencil" and a != 0):
+                step = _stencil_stepper(a, nu, N+2, method_name, u, boundary=boundary)
+                last_step = _stencil_stepper(a, nu_last, N+2, method_name, u, boundary=boundary) if short else step
+            else:
+                if (engine == "matrix" and a != 0):
+                    _operator(method_name, int(np.sign(a)), nu, N+2, boundary)
+                step = lambda u: _iteration(a, nu, N+2, method_name, u, boundary=boundary)
+                last_step = (lambda u: _iteration(a, nu_last, N+2, method_name, u, boundary=boundary)) if short else step
+        step = stats.wrap("step", step)
+        last_step = stats.wrap("step", last_step)
+
+        t = t0 + dt * k0
+        k = k0 + 1
+        ks = k0 // sns + 1
+
+        if (engine == "jump"):
+            with stats.phase("assembly"):
+                P = _operator_power(method_name, int(np.sign(a)), nu, N+2, sns, boundary) if (a != 0) else None
+                # sns - 1 full steps followed by the short one
+                P_last = P
+                if (short and nk % sns == 0):
+                    P_last = _operator(method_name, int(np.sign(a)), nu_last, N+2, boundary)
+                    if (sns > 1):
+                        P_last = P_last @ _operator_power(method_name, int(np.sign(a)), nu, N+2, sns - 1, boundary)
+            jump = stats.wrap("step", lambda u, P: u if P is None else P @ u)
+            for k in range(k0 + sns, nk + 1, sns):
+                t = T if (k == nk) else t0 + dt * k
+                u = jump(u, P_last if (k == nk) else P)
+                u = boundary_conditions(u, x0, xf, f, boundary, a, method_name)
+                save(t, {"u": u})
+                if (checkpoint and k % every == 0):
+                    save_checkpoint(k, t, {"u": u})
+                ks+=1
+            k = max(nk, k0) + 1
+            t = T
+
+        if (engine == "fft"):
+            with stats.phase("assembly"):
+                g = _amplification(a, nu, N+2, method_name)
+                g_last = _amplification(a, nu_last, N+2, method_name) if short else g
+                u0_hat = np.fft.rfft(u0)
+            spectral = stats.wrap("step", lambda k: np.fft.irfft(u0_hat * g**k if (k < nk) else u0_hat * g**(k-1) * g_last, N+2))
+            for k in range(k0 + sns, nk + 1, sns):
+                t = T if (k == nk) else t0 + dt * k
+                u = spectral(k)
+                save(t, {"u": u})
+                if (checkpoint and k % every == 0):
+                    save_checkpoint(k, t, {"u": u})
+                ks+=1
+            k = max(nk, k0) + 1
+            t = T
+
+        while t < T:
+            t = T if (k == nk) else t0 + dt * k
+
+            u = (last_step if (k == nk) else step)(u)
+
+            # Boundary conditions
+            u = boundary_conditions(u, x0, xf, f, boundary, a, method_name)
+        
+            # Snapshot of simulation
+            if (k % sns == 0):
+                save(t, {"u": u})
+                if (checkpoint and k % every == 0):
+                    save_checkpoint(k, t, {"u": u})
+                ks+=1
+
+            k+=1
+
+        profiling.write_attrs(stats, ncf)
+
+    if (resumed):
+        info += f"/ Resumed from iteration: {k0} "
+    info += f"/ Total iterations: {k-1} / Iterations saved: {ks-1}\n "
+
+
+    full_path = ncf.filepath
+
+    print(f"Simulation finished, {output_summary(ncf)}, details:")
+    print(info.replace("/", "\n"))
 
-    # Save initial condition
-    ncf.save(t0, {"u": u0})
+    result = ncf if backend == "memory" else full_path
+    return (result, stats) if stats else result
 
-    u = u0.copy()
-    t = t0
-    k = 1
-    ks = 1
-    while t < T:
-        t = t0 + dt * k
+def _derivative_coefficients(a:float, scheme:str):
+    """
+    Upwind biased approximation dx * u_x(x_i) ~ sum coef * u[i + offset], as a sorted
+    list of (offset, coef) pairs. Stencils are written for a > 0 and mirrored for a < 0.
+    """
+    if (scheme == "upwind1"):
+        stencil = [(-1, -1), (0, 1)]
+    elif (scheme == "upwind2"):
+        stencil = [(-2, 1/2), (-1, -2), (0, 3/2)]
+    elif (scheme == "upwind3"):
+        stencil = [(-2, 1/6), (-1, -1), (0, 1/2), (1, 1/3)]
+    elif (scheme == "centered2"):
+        stencil = [(-1, -1/2), (1, 1/2)]
+    else:
+        raise RuntimeError(f"Unknown spatial scheme '{scheme}' - use 'upwind1', 'upwind2', 'upwind3' or 'centered2'")
+
+    if (a < 0):
+        stencil = [(-offset, -coef) for offset, coef in stencil]
+
+    return sorted(stencil)
+
+def _semi_discrete(a:float, dx:float, dim:int, scheme:str, u):
+    """
+    Spatial operator rhs(t, u, out) = -a * u_x of the method of lines, for time_integration.SSPRK.
+
+    The end points are Dirichlet rows (out = 0). Rows where the stencil of the scheme
+    does not fit fall back to the first order upwind one. The first axis of u is the
+    spatial one, any trailing axes are advanced together.
+    """
+    tmp = np.empty(u.shape)
+    stencils = []
+    for name in (scheme, "upwind1"):
+        stencil = _derivative_coefficients(a, name)
+        lo = max(1, -stencil[0][0])
+        hi = dim - max(1, stencil[-1][0])
+        stencils.append((stencil, lo, hi))
+    (stencil, lo, hi), (upwind, _, _) = stencils
+    scale = -a / dx
+
+    def apply(u, out, stencil, lo, hi):
+        if (lo >= hi):
+            return
+        offset, coef = stencil[0]
+        np.multiply(u[lo+offset:hi+offset], coef * scale, out=out[lo:hi])
+        for offset, coef in stencil[1:]:
+            np.multiply(u[lo+offset:hi+offset], coef * scale, out=tmp[lo:hi])
+            out[lo:hi] += tmp[lo:hi]
+
+    def rhs(t, u, out):
+        out[0] = 0
+        out[-1] = 0
+        apply(u, out, stencil, lo, hi)
+        apply(u, out, upwind, 1, lo)
+        apply(u, out, upwind, hi, dim - 1)
+
+    return rhs
+
+def method_of_lines(x0:float, xf:float, nx:int, T:float, cfl:float, a:float, f, t0:float = 0, sns:int = 1, path_to_save="simulations", space:str = "upwind3", integrator:str = "ssprk3", asynchronous:bool = False, backend:str = "netcdf", profile = None, layout:dict = None):
+    """
+    Solves the advection 1D equation by the method of lines: a semi-discrete spatial
+    scheme advanced in time by time_integration.SSPRK, and saves the results.
 
-        u = _iteration(a, nu, N+2, method_name, u)
+    Parameters:
+    -----------
+    x0 : float
+        The initial spatial coordinate (left boundary of the domain).
+    
+    xf : float
+        The final spatial coordinate (right boundary of the domain).
+    
+    nx : int
+        The number of spatial grid points.
+    
+    T : float
+        The total simulation time, hit exactly by the last step.
 
-        # Boundary conditions
-        u = _boundary_conditions(u, x0, xf, f, 'dirichlet', a, method_name)
+    cfl : float
+        Courant-Friedichs-Levy number, dt = cfl * dx / |a|.
         
-        # Snapshot of simulation
-        if (k % sns == 0):
-            ncf.save(t, {"u": u})
-            ks+=1
+        Stability Condition:
+            0< cfl <= 1 for upwind1, with any integrator.
+            upwind2 is stable up to 0.62, upwind3 up to 1 and centered2 up to 1 with ssprk3.
+    
+    a : float
+        The wave speed (advection velocity).
+    
+    f : function
+        The initial condition function, which defines the initial profile of the solution.
 
-        k+=1
+    t0 : float
+        initial simulation time.
 
-    info += f"/ Total iterations: {k-1} / Iterations saved: {ks-1}\n "
+    sns : int
+        Snapshot step to save the simulation. The final time is always saved.
+    
+    path_to_save : str
+        path to save the simulation. Name will be advection1D-<space>-<integrator>
+
+    space : str
+        Spatial scheme: "upwind1", "upwind2", "upwind3" or "centered2".
+
+    integrator : str
+        Time integrator: "euler", "ssprk2" or "ssprk3".
+
+    asynchronous : bool
+        Write the snapshots from a background thread.
+
+    backend : str
+        Output store: "netcdf", "npy" (memory-mapped .npy directory) or "memory".
+
+    layout : dict
+        Storage options of the variables passed to NcFile.addVars, e.g. {"time_first": True,
+        "zlib": True, "complevel": 4} for the time-major compressed layout. The "npy" and
+        "memory" backends ignore them.
+
+    profile : bool or profiling.Stats
+        Time the phases assembly, rhs and save, returned as (result, stats).
+
+    Returns:
+    --------
+    str
+        The file path where the simulation results are saved (the MemoryStore
+        for the "memory" backend).
+    """
+
+    if (x0 >= xf):
+        raise RuntimeError("Imposible Domain - xf must be greater than x0")
+
+    if (not (0 < cfl and  cfl <= 1)):
+        raise RuntimeError("Unstable method - CFL condition not satisfied")
+
+    x = np.linspace(x0, xf, nx)
+    dx = (xf - x0) / (nx - 1)
+    dt = (T - t0) if a == 0 else cfl * dx / np.abs(a)
 
+    u = f(x).astype(float)
+    stats = profiling.stats_for(profile)
+    with stats.phase("assembly"):
+        rhs = _semi_discrete(a, dx, nx, space, u)
+        stepper = SSPRK(stats.wrap("rhs", rhs), u, integrator)
+
+    # Info
+    info = f" Model: Advection / Method: {space} / Time integrator: {integrator} / Dimension: 1D / Mesh: [{x0}, {xf}] / dx: {dx} / Interval Time: [{t0}, {T}] / dt: {dt} / CFL: {cfl} "
 
-    print(f"Simulation finished, {full_path} generated, details:")
+    full_path = os.path.join(path_to_save, f"advection1D-{space}-{integrator}")
+    with open_output(backend, full_path, int(np.ceil((T - t0) / dt)) // sns + 2, title=f'Advection simulation by method of lines {space} / {integrator}', description=info, author = os.getenv("AUTHOR"), institution = os.getenv("INSTITUTION"), source = os.getenv("REPO_URL"), references ='Gottlieb, S., Shu, C.-W. & Tadmor, E.: Strong Stability-Preserving High-Order Time Discretization Methods 2001', asynchronous = asynchronous) as ncf:
+        ncf.addCoords({'x': x})
+        ncf.addVars(['u'], **(layout or {}))
+
+        save = stats.wrap("save", ncf.save)
+
+        # Save initial condition
+        save(t0, {"u": u})
+
+        ks = 1
+        def snapshot(t, u):
+            nonlocal ks
+            save(t, {"u": u})
+            ks += 1
+
+        k = stepper.integrate(u, t0, T, dt=dt, sns=sns, callback=snapshot)
+
+        profiling.write_attrs(stats, ncf)
+
+    info += f"/ Total iterations: {k} / Iterations saved: {ks-1}\n "
+
+    full_path = ncf.filepath
+
+    print(f"Simulation finished, {output_summary(ncf)}, details:")
     print(info.replace("/", "\n"))
 
-    return full_path
+    result = ncf if backend == "memory" else full_path
+    return (result, stats) if stats else result
+
+def ensemble(method_name:str, x0:float, xf:float, nx:int, T:float, cfl:float, a, fs, t0:float = 0, sns:int = 1,  path_to_save="simulations", engine:str = "stencil", asynchronous:bool = False, backend:str = "netcdf", boundary:str = "dirichlet", profile = None, layout:dict = None):
+    """
+    Solves a batch of advection 1D problems with the same method and mesh, advancing
+    all members together as one (nx, n_members) state, and saves the results.
+
+    Parameters:
+    -----------
+    method_name : str
+        One step method used by every member.
+
+    x0 : float
+        The initial spatial coordinate (left boundary of the domain).
+    
+    xf : float
+        The final spatial coordinate (right boundary of the domain).
+    
+    nx : int
+        The number of spatial grid points.
+    
+    T : float
+        The total simulation time, hit exactly by the last step.
+
+    cfl : float
+        Courant-Friedichs-Levy condition of the fastest member.
+        
+        Stability Condition:
+            0<= cfl <= 1
+    
+    a : float or list of float
+        The wave speed of each member, all with the same sign. A single value is shared.
+    
+    fs : function or list of functions
+        The initial condition of each member. A single function is shared.
+
+    t0 : float
+        initial simulation time.
+
+    sns : int
+        Snapshot step to save the simulation.
+    
+    path_to_save : str
+        path to save the simulation. Name will be advection1D-<method>-ensemble
+
+    engine : str
+        How each time step is applied:
+            "stencil": one vectorized slice update over the whole block.
+            "matrix": one sparse product with the block operator of every member, written
+                      into two preallocated buffers.
+            "jump": as "matrix" but with the cached operator A^sns per snapshot.
+
+    asynchronous : bool
+        Write the snapshots from a background thread while the solver keeps stepping.
+
+    backend : str
+        Output store: "netcdf", "npy" (memory-mapped .npy directory) or "memory".
+
+    layout : dict
+        Storage options of the variables passed to NcFile.addVars, e.g. {"time_first": True,
+        "zlib": True, "complevel": 4} for the time-major compressed layout. The "npy" and
+        "memory" backends ignore them.
+
+    boundary : str
+        "dirichlet" or "periodic" (xf identified with x0 and left out of the grid).
+
+    profile : bool or profiling.Stats
+        Time the phases assembly, step, boundary (non periodic) and save, returned as (result, stats).
+
+    Returns:
+    --------
+    str
+        The file path where the simulation results are saved (the MemoryStore
+        for the "memory" backend). Variable u has dimensions (x, member, t).
+    """
+
+    if (x0 >= xf):
+        raise RuntimeError("Imposible Domain - xf must be greater than x0")
+
+    if (not (0 <= cfl and  cfl <= 1)):
+        raise RuntimeError("Unstable method - CFL condition not satisfied")
+
+    if (engine not in ("stencil", "matrix", "jump")):
+        raise RuntimeError(f"Unknown engine '{engine}' - use 'stencil', 'matrix' or 'jump'")
+
+    if (method_name in _LIMITERS and engine != "stencil"):
+        raise RuntimeError(f"Flux limiter method '{method_name}' is nonlinear - use engine 'stencil'")
+
+    fs = list(fs) if isinstance(fs, (list, tuple)) else [fs]
+    a = np.atleast_1d(np.asarray(a, dtype=float))
+    n_members = max(len(fs), len(a))
+    if (len(fs) == 1):
+        fs = fs * n_members
+    if (len(a) == 1):
+        a = np.full(n_members, a[0])
+    if (len(fs) != n_members or len(a) != n_members):
+        raise RuntimeError("Ensemble members mismatch - fs and a must have the same length")
+
+    sign = np.sign(a[0])
+    if (np.any(np.sign(a) != sign)):
+        raise RuntimeError("Ensemble members must share the sign of the wave speed")
+
+    N = nx - 2
+    x = np.linspace(x0, xf, nx, endpoint=(boundary != "periodic"))
+    dx = np.abs(xf - x0) / nx
+    if (sign == 0):
+        dt = (T - t0)
+    else:
+        dt = (cfl * dx) / np.abs(a).max()
 
-def select_method(method_name):
+    # Courant Numbers, members with the same speed share the operator
+    nu = a * dt / dx
+    nu_values, nu_index = np.unique(nu, return_inverse=True)
+
+    # Info
+    info = f" Model: Advection / Method: {method_name} / Dimension: 1D / Mesh: [{x0}, {xf}] / dx: {dx} / Interval Time: [{t0}, {T}] / dt: {dt} / CFL: {cfl} / Members: {n_members} / Courant Numbers: {nu_values.tolist()} "
+
+    # Initial Condition
+    def F(y):
+        return np.stack([f(y) for f in fs], axis=-1)
+
+    u0 = F(x)
+
+    stats = profiling.stats_for(profile)
+
+    full_path = os.path.join(path_to_save, f"advection1D-{method_name}-ensemble")
+    with open_output(backend, full_path, _n_steps(t0, T, dt) // sns + 1, title=f'Advection ensemble by method {method_name}', description=info, author = os.getenv("AUTHOR"), institution = os.getenv("INSTITUTION"), source = os.getenv("REPO_URL"), references ='LeVeque, Randall J.: Numerical Methods for Conservation Laws 1992', asynchronous = asynchronous) as ncf:
+        ncf.addCoords({'x': x, 'member': np.arange(n_members)})
+        ncf.addVars(['u'], **(layout or {}))
+
+        save = stats.wrap("save", ncf.save)
+        # Periodic boundaries leave u as it is, nothing to time
+        boundary_conditions = _boundary_conditions if boundary == "periodic" else stats.wrap("boundary", _boundary_conditions)
+
+        # Save initial condition
+        save(t0, {"u": u0})
+
+        u = np.array(u0, dtype=float)
+        nk = _n_steps(t0, T, dt)
+        n_jump = sns if (engine == "jump") else 1
+
+        # The last step is shortened to land exactly on T, with Courant numbers nu * ratio
+        ratio = (T - (t0 + dt * (nk - 1))) / dt
+        short = (nk > 0 and sign != 0 and not np.isclose(ratio, 1, rtol=1e-12, atol=0))
+
+        def operator(value, last=False):
+            if (engine != "jump"):
+                return _operator(method_name, int(sign), value * ratio if last else value, N+2, boundary)
+            if (not last):
+                return _operator_power(method_name, int(sign), value, N+2, n_jump, boundary)
+            # n_jump - 1 full steps followed by the short one
+            A = _operator(method_name, int(sign), value * ratio, N+2, boundary)
+            return A if (n_jump == 1) else A @ _operator_power(method_name, int(sign), value, N+2, n_jump - 1, boundary)
+
+        def stepper(last=False):
+            if (sign == 0):
+                return lambda u: u
+            if (engine == "stencil"):
+                return _stencil_stepper(sign, nu * ratio if last else nu, N+2, method_name, u, boundary=boundary)
+
+            # Members grouped by Courant number once, into one block operator on the
+            # flattened (x, member) state: kron(A, selection of the group) per group
+            B = None
+            for i, value in enumerate(nu_values):
+                members = np.flatnonzero(nu_index == i)
+                select = coo_matrix((np.ones(len(members)), (members, members)), shape=(n_members, n_members))
+                term = kron(operator(float(value), last), select, format='csr')
+                B = term if B is None else B + term
+            B = B.tocsr()
+            buffers = (np.empty(u.shape), np.empty(u.shape))
+
+            def step(u):
+                out = buffers[1] if u is buffers[0] else buffers[0]
+                out.fill(0)
+                csr_matvec(B.shape[0], B.shape[1], B.indptr, B.indices, B.data, u.ravel(), out.ravel())
+                return out
+
+            return step
+
+        with stats.phase("assembly"):
+            step = stepper()
+            last_step = stepper(last=True) if (short and nk % n_jump == 0) else step
+        step = stats.wrap("step", step)
+        last_step = stats.wrap("step", last_step)
+
+        ks = 1
+        for k in range(n_jump, nk + 1, n_jump):
+            t = T if (k == nk) else t0 + dt * k
+
+            u = (last_step if (k == nk) else step)(u)
+
+            # Boundary conditions
+            u = boundary_conditions(u, x0, xf, F, boundary, sign, method_name)
+
+            # Snapshot of simulation
+            if (k % sns == 0):
+                save(t, {"u": u})
+                ks+=1
+
+        profiling.write_attrs(stats, ncf)
+
+    info += f"/ Total iterations: {nk} / Iterations saved: {ks-1}\n "
+
+
+    full_path = ncf.filepath
+
+    print(f"Simulation finished, {output_summary(ncf)}, details:")
+    print(info.replace("/", "\n"))
+
+    result = ncf if backend == "memory" else full_path
+    return (result, stats) if stats else result
+
+def select_method(method_name, engine="stencil"):
     def method(x0: float, xf: float, nx: int, T: float, cfl: float, a: float, f,
-               t0: float = 0, sns: int = 1, path_to_save: str = "simulations") -> str:
+               t0: float = 0, sns: int = 1, path_to_save: str = "simulations", engine: str = engine, asynchronous: bool = False, backend: str = "netcdf", boundary: str = "dirichlet", profile = None, resume: bool = False, checkpoint: int = 0, layout: dict = None) -> str:
         """
         Solves the advection 1D equation using the method and saves the results.
 
@@ -283,7 +1145,7 @@ def select_method(method_name):
             The number of spatial grid points.
 
         T : float
-            The total simulation time.
+            The total simulation time, hit exactly by the last step.
 
         cfl : float
             Courant-Friedrichs-Levy condition of the method.
@@ -306,12 +1168,41 @@ def select_method(method_name):
         path_to_save : str
             Path to save the simulation. Name will be 1D-<method>.
 
+        engine : str
+            "stencil" (matrix-free slice updates), "matrix" (sparse matrix-vector product),
+            "jump" (one product with the cached A^sns per snapshot) or "fft" (periodic
+            linear methods, g(theta)^k in Fourier space per snapshot).
+
+        asynchronous : bool
+            Write the snapshots from a background thread.
+
+        backend : str
+            Output store: "netcdf", "npy" (memory-mapped .npy directory) or "memory".
+
+        layout : dict
+            Storage options of the variables passed to NcFile.addVars, e.g. {"time_first": True,
+            "zlib": True, "complevel": 4} for the time-major compressed layout. The "npy" and
+            "memory" backends ignore them.
+
+        boundary : str
+            "dirichlet" or "periodic" (xf identified with x0 and left out of the grid).
+
+        profile : bool or profiling.Stats
+            Time the phases of the run, returned as (result, stats).
+
+        resume : bool
+            Continue an interrupted run from its output file, from the last checkpoint
+            (or snapshot). The stored grid, method and Courant number must match.
+
+        checkpoint : int
+            Full precision checkpoint of u every checkpoint snapshots, 0 disables them.
+
         Returns:
         --------
         str
             The file path where the simulation results are saved.
         """
-        return _one_step_method(method_name, x0, xf, nx, T, cfl, a, f, t0, sns, path_to_save)
+        return _one_step_method(method_name, x0, xf, nx, T, cfl, a, f, t0, sns, path_to_save, engine, asynchronous, backend, boundary, profile, resume, checkpoint, layout)
     
     method.__name__ = method_name
     return method
@@ -322,3 +1213,104 @@ lax_friedrichs = select_method("lax_friedichs")
 lax_wendroff = select_method("lax_wendroff")
 beam_warming = select_method("beam_warming")
 fromm = select_method("fromm")
+
+# High Resolution (TVD) Methods
+minmod = select_method("minmod")
+superbee = select_method("superbee")
+van_leer = select_method("van_leer")
+mc = select_method("mc")
+
+def _method_name(method):
+    """
+    Internal name of a one step method given as a string or as one of the module methods.
+    """
+    if callable(method):
+        return method.__name__
+    if callable(globals().get(method)):
+        return globals()[method].__name__
+    return method
+
+def _initial_condition(ic):
+    """
+    Initial condition from a function or a picklable (name, args) spec of initial_conditions,
+    e.g. ("bumping", (1, 8)) or ("riemann", {"ul": 1, "ur": 0}).
+    """
+    if callable(ic):
+        return ic
+
+    name, args = ic
+    if isinstance(args, dict):
+        return getattr(initial_conditions, name)(**args)
+    return getattr(initial_conditions, name)(*args)
+
+def _sweep_run(run):
+
+    start = time.perf_counter()
+    path = _one_step_method(run["method"], run["x0"], run["xf"], run["nx"], run["T"], run["cfl"], run["a"], _initial_condition(run["ic"]), run["t0"], run["sns"], run["path_to_save"], run["engine"], boundary=run["boundary"])
+    elapsed = time.perf_counter() - start
+
+    return path, elapsed
+
+def sweep(methods, cfls, nxs, a_values, ics, x0:float, xf:float, T:float, t0:float = 0, sns:int = 1, path_to_save="simulations", workers:int = None, engine:str = "stencil", boundary:str = "dirichlet"):
+    """
+    Runs every combination of (method, cfl, nx, a, initial condition) in a pool of processes.
+
+    Parameters:
+    -----------
+    methods : list
+        One step methods, given by name ("cir", "lax_friedrichs", ...) or as module methods.
+
+    cfls : list of float
+        Courant-Friedichs-Levy numbers.
+
+    nxs : list of int
+        Numbers of spatial grid points.
+
+    a_values : list of float
+        Wave speeds.
+
+    ics : list
+        Initial conditions. Each one is a module level function (f1, f2, ...) or a
+        ("name", args) spec of initial_conditions such as ("bumping", (1, 8)), because
+        closures like bumping(1, 8) can not be sent to other processes.
+
+    x0, xf, T, t0, sns :
+        As in the one step methods, shared by every run.
+
+    path_to_save : str
+        Every run writes into its own directory path_to_save/<run>/.
+
+    workers : int
+        Number of processes. None uses the number of CPUs, 1 runs in this process.
+
+    engine : str
+        Engine of the one step methods.
+
+    boundary : str
+        Boundary conditions of the one step methods, "dirichlet" or "periodic".
+
+    Returns:
+    --------
+    list of dict
+        Manifest with the parameters, the output path and the wall time (s) of each run.
+    """
+
+    runs = []
+    for i, (method, cfl, nx, a, ic) in enumerate(product(methods, cfls, nxs, a_values, ics)):
+        method_name = _method_name(method)
+        runs.append({"method": method_name, "cfl": cfl, "nx": nx, "a": a, "ic": ic,
+                     "x0": x0, "xf": xf, "T": T, "t0": t0, "sns": sns, "engine": engine, "boundary": boundary,
+                     "path_to_save": os.path.join(path_to_save, f"{i:04d}-{method_name}-cfl{cfl}-nx{nx}-a{a}")})
+
+    if (workers == 1):
+        results = [_sweep_run(run) for run in runs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_sweep_run, runs))
+
+    manifest = []
+    for run, (path, elapsed) in zip(runs, results):
+        ic = getattr(run["ic"], "__name__", str(run["ic"]))
+        manifest.append({"method": run["method"], "cfl": run["cfl"], "nx": run["nx"], "a": run["a"], "ic": ic, "path": path, "time": elapsed})
+
+    return manifest
@@ -0,0 +1,339 @@
+import numpy as np
+import advection
+import profiling
+from ncfiles import open_output, output_summary
+from scipy.sparse import diags, identity, kron
+# Sparse product y += A x into a given output, scipy has no public out= for it
+from scipy.sparse._sparsetools import csr_matvec
+from functools import lru_cache
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+@lru_cache(maxsize=8)
+def _sweep_operator(method:str, sign:int, nu, nx:int, ny:int, axis:int):
+    """
+    Cached sparse operator of one step of the 1-D method along axis of the raveled
+    (C order) (nx, ny) field, built with kron from `advection._operator`.
+
+    The boundary lines across the sweep are identity rows, so the whole frame of the
+    domain keeps its Dirichlet values.
+    """
+    if (axis == 0):
+        inner = np.ones(ny)
+        inner[[0, -1]] = 0
+        K = kron(advection._operator(method, sign, nu, nx), diags(inner)) + kron(identity(nx), diags(1 - inner))
+    else:
+        inner = np.ones(nx)
+        inner[[0, -1]] = 0
+        K = kron(diags(inner), advection._operator(method, sign, nu, ny)) + kron(diags(1 - inner), identity(ny))
+
+    return K.tocsr()
+
+@lru_cache(maxsize=8)
+def _strang_operator(method:str, sign_x:int, nu_x, sign_y:int, nu_y, nx:int, ny:int):
+    """
+    Cached operator of one Strang step X(dt/2) Y(dt) X(dt/2). Sweeps with zero speed are skipped.
+    """
+    S = identity(nx * ny, format='csr')
+    if (sign_x != 0):
+        X = _sweep_operator(method, sign_x, nu_x / 2, nx, ny, 0)
+        S = X
+    if (sign_y != 0):
+        S = _sweep_operator(method, sign_y, nu_y, nx, ny, 1) @ S
+    if (sign_x != 0):
+        S = X @ S
+
+    return S.tocsr()
+
+def _sweep(a:float, nu, dim:int, method:str, u, axis:int):
+    """
+    Matrix-free sweep of the 1-D method along axis of the 2-D field u.
+
+    Reuses `advection._stencil_stepper` along the axis, so every row (or column) is
+    advanced in the same vectorized slice update. The Beam-Warming / Fromm copy row
+    and the boundary lines across the sweep are restored afterwards, the whole frame
+    of the domain keeps its Dirichlet values.
+    """
+    step = advection._stencil_stepper(a, nu, dim, method, u, axis)
+    at = lambda start, stop: advection._along(axis, start, stop)
+    across = lambda start, stop: advection._along(1 - axis, start, stop)
+    edges = (u[across(None, 1)].copy(), u[across(-1, None)].copy())
+    copy = method in ("beam_warming", "fromm")
+
+    def sweep(u):
+        u = step(u)
+
+        if (copy):
+            if (a > 0):
+                u[at(1, 2)] = u[at(None, 1)]
+            else:
+                u[at(-2, -1)] = u[at(-1, None)]
+
+        u[across(None, 1)] = edges[0]
+        u[across(-1, None)] = edges[1]
+
+        return u
+
+    return sweep
+
+def _strang_method(method_name:str, x0:float, xf:float, nx:int, y0:float, yf:float, ny:int, T:float, cfl:float, ax:float, ay:float, f, t0:float = 0, sns:int = 1, path_to_save="simulations", engine:str = "stencil", asynchronous:bool = False, backend:str = "netcdf", profile = None, layout:dict = None):
+    """
+    Solves the advection 2D equation u_t + ax u_x + ay u_y = 0 by Strang splitting,
+    X(dt/2) Y(dt) X(dt/2), of a 1-D one step method and saves the results.
+
+    Parameters:
+    -----------
+    method_name : str
+        1-D method of the sweeps, any one step or flux limiter method of advection.
+
+    x0, xf : float
+        The boundaries of the domain in x.
+
+    nx : int
+        The number of grid points in x.
+
+    y0, yf : float
+        The boundaries of the domain in y.
+
+    ny : int
+        The number of grid points in y.
+
+    T : float
+        The total simulation time, hit exactly by the last step.
+
+    cfl : float
+        Courant-Friedichs-Levy condition of the method, dt = cfl * min(dx / |ax|, dy / |ay|).
+
+        Stability Condition:
+            0<= cfl <= 1
+
+    ax, ay : float
+        The wave speeds (advection velocity).
+
+    f : function
+        The initial condition f(X, Y), evaluated on the (nx, ny) grid.
+
+    t0 : float
+        initial simulation time.
+
+    sns : int
+        Snapshot step to save the simulation.
+
+    path_to_save : str
+        path to save the simulation. Name will be advection2D-<method>
+
+    engine : str
+        How each Strang step is applied:
+            "stencil": row and column sweeps with vectorized slice updates into preallocated buffers.
+            "matrix": sparse matrix-vector product with the cached kron-built step operator,
+                      written into two preallocated buffers.
+
+    asynchronous : bool
+        Write the snapshots from a background thread while the solver keeps stepping.
+
+    backend : str
+        Output store: "netcdf", "npy" (memory-mapped .npy directory) or "memory".
+
+    layout : dict
+        Storage options of the variables passed to NcFile.addVars, e.g. {"time_first": True,
+        "zlib": True, "complevel": 4} for the time-major compressed layout. The "npy" and
+        "memory" backends ignore them.
+
+    profile : bool or profiling.Stats
+        Time the phases assembly, sweep_x and sweep_y (step for the matrix engine)
+        and save, returned as (result, stats).
+
+    Returns:
+    --------
+    str
+        The file path where the simulation results are saved (the MemoryStore
+        for the "memory" backend).
+    """
+
+    if (x0 >= xf or y0 >= yf):
+        raise RuntimeError("Imposible Domain - xf (yf) must be greater than x0 (y0)")
+
+    if (not (0 <= cfl and  cfl <= 1)):
+        raise RuntimeError("Unstable method - CFL condition not satisfied")
+
+    if (engine not in ("stencil", "matrix")):
+        raise RuntimeError(f"Unknown engine '{engine}' - use 'stencil' or 'matrix'")
+
+    if (method_name in advection._LIMITERS and engine != "stencil"):
+        raise RuntimeError(f"Flux limiter method '{method_name}' is nonlinear - use engine 'stencil'")
+
+    x = np.linspace(x0, xf, nx)
+    y = np.linspace(y0, yf, ny)
+    dx = (xf - x0) / (nx - 1)
+    dy = (yf - y0) / (ny - 1)
+
+    speed = max(np.abs(ax) / dx, np.abs(ay) / dy)
+    dt = (T - t0) if (speed == 0) else cfl / speed
+
+    # Courant Numbers
+    nu_x = ax * dt / dx
+    nu_y = ay * dt / dy
+
+    # Info
+    info = f" Model: Advection / Method: {method_name} / Dimension: 2D / Splitting: Strang / Mesh: [{x0}, {xf}] x [{y0}, {yf}] / dx: {dx} / dy: {dy} / Interval Time: [{t0}, {T}] / dt: {dt} / CFL: {cfl} / Courant Numbers: ({nu_x}, {nu_y}) "
+
+    # Initial Condition, C order so the row sweeps and the column sweeps run over contiguous rows
+    X, Y = np.meshgrid(x, y, indexing='ij')
+    u = np.ascontiguousarray(f(X, Y), dtype=float)
+    del X, Y
+
+    stats = profiling.stats_for(profile)
+    nk = advection._n_steps(t0, T, dt)
+
+    # The last step is shortened to land exactly on T, with Courant numbers nu * ratio
+    ratio = (T - (t0 + dt * (nk - 1))) / dt
+    short = (nk > 0 and speed != 0 and not np.isclose(ratio, 1, rtol=1e-12, atol=0))
+
+    def stepper(ratio=1):
+        if (engine == "stencil"):
+            sweeps = []
+            if (ax != 0):
+                half = stats.wrap("sweep_x", _sweep(ax, nu_x * ratio / 2, nx, method_name, u, 0))
+                sweeps.append(half)
+            if (ay != 0):
+                sweeps.append(stats.wrap("sweep_y", _sweep(ay, nu_y * ratio, ny, method_name, u, 1)))
+            if (ax != 0):
+                sweeps.append(half)
+
+            def step(u):
+                for sweep in sweeps:
+                    u = sweep(u)
+                return u
+
+            return step
+
+        S = _strang_operator(method_name, int(np.sign(ax)), nu_x * ratio, int(np.sign(ay)), nu_y * ratio, nx, ny)
+        buffers = (np.empty((nx, ny)), np.empty((nx, ny)))
+
+        def step(u):
+            out = buffers[1] if u is buffers[0] else buffers[0]
+            out.fill(0)
+            csr_matvec(nx * ny, nx * ny, S.indptr, S.indices, S.data, u.ravel(), out.ravel())
+            return out
+
+        return stats.wrap("step", step)
+
+    with stats.phase("assembly"):
+        step = stepper()
+        last_step = stepper(ratio) if short else step
+
+    full_path = os.path.join(path_to_save, f"advection2D-{method_name}")
+    with open_output(backend, full_path, nk // sns + 1, title=f'Advection 2D simulation by method {method_name}', description=info, author = os.getenv("AUTHOR"), institution = os.getenv("INSTITUTION"), source = os.getenv("REPO_URL"), references ='LeVeque, Randall J.: Finite Volume Methods for Hyperbolic Problems 2002', asynchronous = asynchronous) as ncf:
+        ncf.addCoords({'x': x, 'y': y})
+        ncf.addVars(['u'], **(layout or {}))
+
+        save = stats.wrap("save", ncf.save)
+
+        # Save initial condition
+        save(t0, {"u": u})
+
+        ks = 1
+        for k in range(1, nk + 1):
+            t = T if (k == nk) else t0 + dt * k
+
+            u = (last_step if (k == nk) else step)(u)
+
+            # Snapshot of simulation
+            if (k % sns == 0):
+                save(t, {"u": u})
+                ks+=1
+
+        profiling.write_attrs(stats, ncf)
+
+    info += f"/ Total iterations: {nk} / Iterations saved: {ks-1}\n "
+
+    full_path = ncf.filepath
+
+    print(f"Simulation finished, {output_summary(ncf)}, details:")
+    print(info.replace("/", "\n"))
+
+    result = ncf if backend == "memory" else full_path
+    return (result, stats) if stats else result
+
+def select_method(method_name, engine="stencil"):
+    def method(x0: float, xf: float, nx: int, y0: float, yf: float, ny: int, T: float, cfl: float, ax: float, ay: float, f,
+               t0: float = 0, sns: int = 1, path_to_save: str = "simulations", engine: str = engine, asynchronous: bool = False, backend: str = "netcdf", profile = None, layout: dict = None) -> str:
+        """
+        Solves the advection 2D equation by Strang splitting of the 1-D method and saves the results.
+
+        Parameters:
+        -----------
+        x0, xf : float
+            The boundaries of the domain in x.
+
+        nx : int
+            The number of grid points in x.
+
+        y0, yf : float
+            The boundaries of the domain in y.
+
+        ny : int
+            The number of grid points in y.
+
+        T : float
+            The total simulation time, hit exactly by the last step.
+
+        cfl : float
+            Courant-Friedrichs-Levy condition of the method, dt = cfl * min(dx / |ax|, dy / |ay|).
+
+        ax, ay : float
+            The wave speeds (advection velocity).
+
+        f : function
+            The initial condition f(X, Y).
+
+        t0 : float
+            initial simulation time.
+
+        sns : int
+            Snapshot step to save the simulation.
+
+        path_to_save : str
+            Path to save the simulation. Name will be advection2D-<method>.
+
+        engine : str
+            "stencil" (row and column slice updates) or "matrix" (cached kron-built sparse operator).
+
+        asynchronous : bool
+            Write the snapshots from a background thread.
+
+        backend : str
+            Output store: "netcdf", "npy" (memory-mapped .npy directory) or "memory".
+
+        layout : dict
+            Storage options of the variables passed to NcFile.addVars, e.g. {"time_first": True,
+            "zlib": True, "complevel": 4} for the time-major compressed layout. The "npy" and
+            "memory" backends ignore them.
+
+        profile : bool or profiling.Stats
+            Time the phases of the run, returned as (result, stats).
+
+        Returns:
+        --------
+        str
+            The file path where the simulation results are saved.
+        """
+        return _strang_method(method_name, x0, xf, nx, y0, yf, ny, T, cfl, ax, ay, f, t0, sns, path_to_save, engine, asynchronous, backend, profile, layout)
+
+    method.__name__ = method_name
+    return method
+
+# One Step Methods
+cir = select_method("cir")
+lax_friedrichs = select_method("lax_friedichs")
+lax_wendroff = select_method("lax_wendroff")
+beam_warming = select_method("beam_warming")
+fromm = select_method("fromm")
+
+# High Resolution (TVD) Methods
+minmod = select_method("minmod")
+superbee = select_method("superbee")
+van_leer = select_method("van_leer")
+mc = select_method("mc")
@@ -0,0 +1,237 @@
+import numpy as np
+import advection
+import burgers
+import euler_isothermal
+import initial_conditions
+from contextlib import redirect_stdout
+import argparse
+import platform
+import json
+import time
+import sys
+import io
+import re
+
+# Methods benchmarked by default
+ADVECTION_METHODS = ["cir", "lax_friedrichs", "lax_wendroff", "beam_warming", "fromm", "minmod", "superbee", "van_leer", "mc"]
+BURGERS_METHODS = ["godunov", "engquist_osher", "rusanov"]
+EULER_METHODS = ["rusanov", "hll", "roe"]
+
+def _errors(u, v, dx:float):
+    """
+    Grid norms L1, L2 and Linf of u - v.
+    """
+    e = np.abs(np.asarray(u, dtype=float) - np.asarray(v, dtype=float))
+    return {"l1": float(dx * e.sum()), "l2": float(np.sqrt(dx * (e * e).sum())), "linf": float(e.max())}
+
+def _timed(solver, *args, repeat:int = 1, **kwargs):
+    """
+    Runs solver(*args, **kwargs) repeat times with its summary captured. Returns the
+    result of the last run, the best wall time and the number of time steps, read from
+    the "Total iterations" line that every solver prints.
+    """
+    best = np.inf
+    for _ in range(repeat):
+        summary = io.StringIO()
+        with redirect_stdout(summary):
+            start = time.perf_counter()
+            result = solver(*args, **kwargs)
+            best = min(best, time.perf_counter() - start)
+
+    match = re.search(r"Total iterations: (\d+)", summary.getvalue())
+    steps = int(match.group(1)) if match else 0
+
+    return result, best, steps
+
+def _record(model:str, method:str, nx:int, cfl:float, wall:float, steps:int, errors:dict):
+    return {"model": model, "method": method, "nx": nx, "cfl": cfl, "steps": steps, "time": wall,
+            "updates_per_second": nx * steps / wall if wall > 0 else float("inf"), **errors}
+
+def advection_suite(methods = ADVECTION_METHODS, nxs = (200, 400, 800), cfls = (0.5, 0.9), a:float = 1, engine:str = "stencil", repeat:int = 3):
+    """
+    Runs the advection one step methods on a gaussian pulse over the periodic [-1, 2)
+    up to T = 1 and compares the last snapshot with method_of_characteristics at the
+    same time. The pulse stays far from the ends, so the periodic and the free space
+    solutions agree.
+
+    Periodic grids are used because the Dirichlet grid of the one step methods has
+    spacing (xf - x0) / (nx - 1) but Courant number a * dt * nx / (xf - x0), a speed
+    error of order 1 / nx that would hide the order of every scheme.
+    """
+    x0, xf, T = -1, 2, 1
+    f = initial_conditions.bumping(1, 50)
+
+    records = []
+    for method in methods:
+        solver = getattr(advection, method)
+        for cfl in cfls:
+            for nx in nxs:
+                # Save only the initial condition and the last step
+                dt = cfl * (xf - x0) / nx / np.abs(a)
+                sns = advection._n_steps(0, T, dt)
+
+                store, wall, steps = _timed(solver, x0, xf, nx, T, cfl, a, f, sns=sns, engine=engine, backend="memory", boundary="periodic", repeat=repeat)
+                data = store.arrays()
+                t = data["t"][-1]
+
+                # Same points as the periodic grid, plus xf
+                exact, _, _ = _timed(advection.method_of_characteristics, x0, xf, nx + 1, t, 1, a, f, times=[t], backend="memory")
+                errors = _errors(data["u"][-1], exact.arrays()["u"][-1][:-1], (xf - x0) / nx)
+                records.append(_record("advection", method, nx, cfl, wall, steps, errors))
+
+    return records
+
+def burgers_suite(methods = BURGERS_METHODS, nxs = (200, 400, 800), cfls = (0.5, 0.9), integrator:str = "euler", repeat:int = 3):
+    """
+    Runs the Burgers finite volume methods on a square pulse over [-1, 2] up to T = 1,
+    a shock and a rarefaction, and compares the final state with burgers.exact_solution.
+    """
+    x0, xf, T = -1, 2, 1
+    f = initial_conditions.square(-0.5, 0, 0, 1)
+
+    records = []
+    for method in methods:
+        solver = getattr(burgers, method)
+        for cfl in cfls:
+            for nx in nxs:
+                store, wall, steps = _timed(solver, x0, xf, nx, T, cfl, f, sns=10**9, backend="memory", integrator=integrator, repeat=repeat)
+                exact, _, _ = _timed(burgers.exact_solution, x0, xf, nx, T, 1, f, times=[T], backend="memory")
+                errors = _errors(store.arrays()["u"][-1], exact.arrays()["u"][-1], (xf - x0) / (nx - 1))
+                records.append(_record("burgers", method, nx, cfl, wall, steps, errors))
+
+    return records
+
+def euler_suite(methods = EULER_METHODS, nxs = (200, 400, 800), cfls = (0.5, 0.9), integrator:str = "euler", repeat:int = 3):
+    """
+    Runs the isothermal Euler finite volume methods on the Riemann problem
+    (2, 0) | (1, 0) over [-1, 1] up to T = 0.3 and compares the final density with
+    euler_isothermal.exact_solution.
+    """
+    x0, xf, T, c = -1, 1, 0.3, 1
+    ql, qr = (2, 0), (1, 0)
+    frho, fm = euler_isothermal.riemann(ql, qr)
+
+    records = []
+    for method in methods:
+        solver = getattr(euler_isothermal, method)
+        for cfl in cfls:
+            for nx in nxs:
+                store, wall, steps = _timed(solver, x0, xf, nx, T, cfl, c, frho, fm, sns=10**9, backend="memory", integrator=integrator, repeat=repeat)
+                exact, _, _ = _timed(euler_isothermal.exact_solution, x0, xf, nx, T, 1, c, ql, qr, times=[T], backend="memory")
+                errors = _errors(store.arrays()["rho"][-1], exact.arrays()["rho"][-1], (xf - x0) / (nx - 1))
+                records.append(_record("euler_isothermal", method, nx, cfl, wall, steps, errors))
+
+    return records
+
+def convergence_orders(records):
+    """
+    Adds the observed orders order_l1, order_l2 and order_linf to every record, from
+    the previous nx of the same (model, method, cfl), as log(e_coarse / e_fine) / log(nx_fine / nx_coarse).
+    """
+    groups = {}
+    for record in records:
+        groups.setdefault((record["model"], record["method"], record["cfl"]), []).append(record)
+
+    for group in groups.values():
+        group.sort(key=lambda record: record["nx"])
+        for coarse, fine in zip(group[:-1], group[1:]):
+            for norm in ("l1", "l2", "linf"):
+                if coarse[norm] > 0 and fine[norm] > 0:
+                    fine[f"order_{norm}"] = float(np.log(coarse[norm] / fine[norm]) / np.log(fine["nx"] / coarse["nx"]))
+
+    return records
+
+def run(models = ("advection", "burgers", "euler_isothermal"), nxs = (200, 400, 800), cfls = (0.5, 0.9), repeat:int = 3):
+    """
+    Runs the suites of the given models.
+
+    Returns:
+    --------
+    dict
+        {"meta": machine and library versions, "runs": one record per (model, method, nx, cfl)}
+        with the errors, the observed orders, the wall time (s) and the cell updates per second.
+    """
+    suites = {"advection": advection_suite, "burgers": burgers_suite, "euler_isothermal": euler_suite}
+
+    records = []
+    for model in models:
+        if (model not in suites):
+            raise RuntimeError(f"Unknown model '{model}' - use {', '.join(suites)}")
+        records += suites[model](nxs=nxs, cfls=cfls, repeat=repeat)
+
+    meta = {"date": time.ctime(time.time()), "python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "processor": platform.processor(), "system": platform.platform()}
+
+    return {"meta": meta, "runs": convergence_orders(records)}
+
+def compare(results, baseline, tolerance:float = 0.25, error_tolerance:float = 0.01):
+    """
+    Regressions of results against a baseline run, matched by (model, method, nx, cfl).
+
+    A run regresses when its cell updates per second fall below (1 - tolerance) times
+    the baseline, or when its L1 error grows more than error_tolerance (relative).
+
+    Returns:
+    --------
+    list of str
+        A description of each regression, empty when the results are accepted.
+    """
+    key = lambda record: (record["model"], record["method"], record["nx"], record["cfl"])
+    reference = {key(record): record for record in baseline["runs"]}
+
+    regressions = []
+    for record in results["runs"]:
+        base = reference.get(key(record))
+        if base is None:
+            continue
+
+        name = "{} {} nx={} cfl={}".format(*key(record))
+        if record["updates_per_second"] < (1 - tolerance) * base["updates_per_second"]:
+            regressions.append(f"{name}: throughput {record['updates_per_second']:.3e} < baseline {base['updates_per_second']:.3e} updates/s")
+        if record["l1"] > (1 + error_tolerance) * base["l1"]:
+            regressions.append(f"{name}: L1 error {record['l1']:.3e} > baseline {base['l1']:.3e}")
+
+    return regressions
+
+def main(argv = None):
+    """
+    Command line entry point: python benchmark.py [--output results.json] [--baseline baseline.json]
+
+    Exits with status 1 when the results regress against the baseline.
+    """
+    parser = argparse.ArgumentParser(description="Accuracy and throughput benchmarks of the Numerica solvers.")
+    parser.add_argument("--models", nargs="+", default=["advection", "burgers", "euler_isothermal"])
+    parser.add_argument("--nx", nargs="+", type=int, default=[200, 400, 800])
+    parser.add_argument("--cfl", nargs="+", type=float, default=[0.5, 0.9])
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions of every run, the best wall time is kept.")
+    parser.add_argument("--output", default="benchmark.json", help="JSON file of the results.")
+    parser.add_argument("--baseline", help="JSON file of a previous run to compare with.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Accepted relative loss of throughput.")
+    args = parser.parse_args(argv)
+
+    results = run(args.models, args.nx, args.cfl, args.repeat)
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+
+    print(f"{'model':<18}{'method':<16}{'nx':>6}{'cfl':>6}{'L1':>12}{'order':>8}{'Linf':>12}{'time (s)':>10}{'updates/s':>12}")
+    for record in results["runs"]:
+        order = record.get("order_l1")
+        order = f"{order:8.2f}" if order is not None else f"{'-':>8}"
+        print(f"{record['model']:<18}{record['method']:<16}{record['nx']:>6}{record['cfl']:>6}{record['l1']:>12.3e}{order}{record['linf']:>12.3e}{record['time']:>10.4f}{record['updates_per_second']:>12.3e}")
+    print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
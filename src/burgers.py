@@ -1,7 +1,14 @@
 import plotly.graph_objects as go
 import numpy as np
+from ncfiles import open_output, output_summary
+from time_integration import SSPRK
+import profiling
+from dotenv import load_dotenv
+import os
 
-def plot_method_of_characteristics(x0:float, xf:float, nx:int, T:float, nt:int, f):
+load_dotenv()
+
+def plot_method_of_characteristics(x0:float, xf:float, nx:int, T:float, nt:int, f, show:bool = True):
     """
     Plots the solution of the Burgers' equation using the method of characteristics.
 
@@ -25,10 +32,14 @@ def plot_method_of_characteristics(x0:float, xf:float, nx:int, T:float, nt:int,
     f : function
         The initial condition function, which defines the initial profile of the solution.
 
+    show : bool
+        Display the figure, otherwise it is only returned (see ncviewer.export).
+
     Returns:
     --------
-    None
-        The function generates and displays a plot but does not return any values.
+    plotly.graph_objects.Figure
+        The animation. u is constant along the characteristics, so it is stored once
+        in the figure and every frame only carries its x, as float32.
     """
     x = np.linspace(x0, xf, nx)
     xi = np.copy(x)
@@ -53,14 +64,7 @@ def plot_method_of_characteristics(x0:float, xf:float, nx:int, T:float, nt:int,
         x = xi + f(xi) * t
         iteration_frames.append(
             go.Frame(
-                data=[
-                    go.Scatter(
-                        x=x,
-                        y=f(xi),
-                        mode="lines",
-                        showlegend=False,
-                    )
-                ],
+                data=[go.Scatter(x=x.astype(np.float32))],
                 name=str(t),
             )
         )
@@ -127,4 +131,400 @@ def plot_method_of_characteristics(x0:float, xf:float, nx:int, T:float, nt:int,
         ]
     )
 
-    fig.show()
\ No newline at end of file
+    if show:
+        fig.show()
+
+    return fig
+
+def _monotone_argmin(y, h, s):
+    """
+    Smallest j minimizing h[j] - s[q] * y[j] for every query q, with y and s increasing.
+
+    The minimizer is nondecreasing in s, so the queries are solved by divide and
+    conquer: the middle query of every segment is searched only between the minimizers
+    of its neighbours, all segments of a level at once. Each level costs O(len(y) + len(s))
+    vectorized operations and there are log2(len(s)) levels.
+    """
+    result = np.empty(len(s), dtype=np.intp)
+
+    # Segments [qa, qb) of queries whose minimizers lie in the columns [L, R]
+    qa, qb = np.array([0]), np.array([len(s)])
+    L, R = np.array([0]), np.array([len(y) - 1])
+
+    while len(qa):
+        mid = (qa + qb) // 2
+        lengths = R - L + 1
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        segment = np.repeat(np.arange(len(qa)), lengths)
+        position = np.arange(len(segment))
+        columns = L[segment] + position - starts[segment]
+
+        values = h[columns] - s[mid][segment] * y[columns]
+        minima = np.minimum.reduceat(values, starts)
+        first = np.minimum.reduceat(np.where(values == minima[segment], position, len(segment)), starts)
+        j = columns[first]
+        result[mid] = j
+
+        # Children: [qa, mid) in [L, j] and [mid + 1, qb) in [j, R]
+        left, right = qa < mid, mid + 1 < qb
+        qa, qb = np.concatenate((qa[left], mid[right] + 1)), np.concatenate((mid[left], qb[right]))
+        L, R = np.concatenate((L[left], j[right])), np.concatenate((j[left], R[right]))
+
+    return result
+
+def _lax_oleinik(y, U0, x, t):
+    """
+    Entropy solution u(x, t) = (x - y*) / t of Burgers by the Lax-Oleinik formula,
+    y* = argmin U0(y) + (x - y)^2 / (2t) over the sampled y.
+
+    Dropping x^2 / (2t) the minimized function is U0(y) + y^2 / (2t) - (x / t) y, whose
+    minimizer is monotone in x, so all x (sorted) are solved by `_monotone_argmin`.
+    """
+    j = _monotone_argmin(y, U0 + y * y / (2 * t), x / t)
+    return (x - y[j]) / t
+
+def exact_solution(x0:float, xf:float, nx:int, T:float, nt:int, f, sns:int = 1, path_to_save="simulations", asynchronous:bool = False, backend:str = "netcdf", times = None, ny:int = None, layout:dict = None):
+    """
+    Exact entropy (weak) solution of the Burgers 1D equation, valid after shocks form,
+    by the Lax-Oleinik formula, and saves the results.
+
+    Parameters:
+    -----------
+    x0 : float
+        The initial spatial coordinate (left boundary of the domain).
+    
+    xf : float
+        The final spatial coordinate (right boundary of the domain).
+    
+    nx : int
+        The number of spatial grid points.
+    
+    T : float
+        The total simulation time.
+    
+    nt : int
+        The number of time steps.
+    
+    f : function
+        The initial condition function, which defines the initial profile of the solution.
+
+    sns : int
+        snapshot step to save simulation.
+    
+    path_to_save : str
+        path to save the simulation. Name will be burgers1D-exact
+
+    asynchronous : bool
+        Write the snapshots from a background thread.
+
+    backend : str
+        Output store: "netcdf", "npy" (memory-mapped .npy directory) or "memory".
+
+    layout : dict
+        Storage options of the variables passed to NcFile.addVars, e.g. {"time_first": True,
+        "zlib": True, "complevel": 4} for the time-major compressed layout. The "npy" and
+        "memory" backends ignore them.
+
+    times : array of float
+        Explicit output times. By default dt * k for every k multiple of sns, with dt = T / nt.
+
+    ny : int
+        Number of samples of the initial condition, 4 * nx by default. The
+        solution is exact up to the sample spacing.
+
+    Returns:
+    --------
+    str
+        The file path where the simulation results are saved (the MemoryStore
+        for the "memory" backend).
+    """
+
+    x = np.linspace(x0, xf, nx)
+    dt = T / nt
+
+    if times is None:
+        times = dt * np.arange(0, nt + 1, sns)
+    times = np.atleast_1d(np.asarray(times, dtype=float))
+
+    # Samples covering the domain of dependence: |x - y*| <= t max|u0|
+    y = np.linspace(x0, xf, ny if ny else 4 * nx)
+    speed = np.abs(f(y)).max()
+    margin = times.max() * speed
+    ny = int(len(y) * (1 + 2 * margin / (xf - x0))) + 1
+    y = np.linspace(x0 - margin, xf + margin, ny)
+
+    # U0(y) = integral of u0 from y[0], by trapezoids
+    u0 = f(y)
+    U0 = np.empty(ny)
+    U0[0] = 0
+    np.cumsum(0.5 * (u0[1:] + u0[:-1]) * np.diff(y), out=U0[1:])
+
+    full_path = os.path.join(path_to_save, "burgers1D-exact")
+    with open_output(backend, full_path, len(times), title='Burgers simulation by Lax-Oleinik formula', description="Exact entropy solution of Burgers by Lax-Oleinik formula", author = os.getenv("AUTHOR"), institution = os.getenv("INSTITUTION"), source = os.getenv("REPO_URL"), references ='LeVeque, Randall J.: Numerical Methods for Conservation Laws 1992', asynchronous = asynchronous) as ncf:
+        ncf.addCoords({"x": x})
+        ncf.addVars(['u'], **(layout or {}))
+
+        u = np.empty((len(times), nx))
+        for k, t in enumerate(times):
+            u[k] = f(x) if t == 0 else _lax_oleinik(y, U0, x, t)
+
+        ncf.saveBlock(times, {"u": u})
+
+    full_path = ncf.filepath
+
+    print(f"Simulation finished, {output_summary(ncf)}, details:")
+    print("Exact entropy solution of Burgers by Lax-Oleinik formula")
+
+    return ncf if backend == "memory" else full_path
+
+def _flux_godunov(ul, ur, out, tmp):
+    """
+    Exact Riemann flux of f(u) = u^2 / 2: max(f(max(ul, 0)), f(min(ur, 0))).
+    """
+    np.maximum(ul, 0, out=out)
+    np.minimum(ur, 0, out=tmp)
+    np.multiply(out, out, out=out)
+    np.multiply(tmp, tmp, out=tmp)
+    np.maximum(out, tmp, out=out)
+    out *= 0.5
+    return out
+
+def _flux_engquist_osher(ul, ur, out, tmp):
+    """
+    Engquist-Osher flux of f(u) = u^2 / 2: f(max(ul, 0)) + f(min(ur, 0)).
+    """
+    np.maximum(ul, 0, out=out)
+    np.minimum(ur, 0, out=tmp)
+    np.multiply(out, out, out=out)
+    np.multiply(tmp, tmp, out=tmp)
+    out += tmp
+    out *= 0.5
+    return out
+
+def _flux_rusanov(ul, ur, out, tmp):
+    """
+    Rusanov (local Lax-Friedrichs) flux of f(u) = u^2 / 2:
+    (f(ul) + f(ur)) / 2 - max(|ul|, |ur|) (ur - ul) / 2.
+    """
+    np.abs(ul, out=out)
+    np.abs(ur, out=tmp)
+    np.maximum(out, tmp, out=out)
+    np.subtract(ur, ul, out=tmp)
+    out *= tmp
+    np.multiply(ul, ul, out=tmp)
+    tmp *= 0.5
+    out -= tmp
+    np.multiply(ur, ur, out=tmp)
+    tmp *= 0.5
+    out -= tmp
+    out *= -0.5
+    return out
+
+_FLUXES = {"godunov": _flux_godunov, "engquist_osher": _flux_engquist_osher, "rusanov": _flux_rusanov}
+
+def _finite_volume(method_name:str, x0:float, xf:float, nx:int, T:float, cfl:float, f, t0:float = 0, sns:int = 1, path_to_save="simulations", asynchronous:bool = False, backend:str = "netcdf", integrator:str = "euler", profile = None, layout:dict = None):
+    """
+    Solves the Burgers 1D equation u_t + (u^2 / 2)_x = 0 with a conservative
+    finite volume method and saves the results.
+
+    Parameters:
+    -----------
+    method_name : str
+        Numerical flux: "godunov", "engquist_osher" or "rusanov".
+
+    x0 : float
+        The initial spatial coordinate (center of the first cell).
+    
+    xf : float
+        The final spatial coordinate (center of the last cell).
+    
+    nx : int
+        The number of cells.
+    
+    T : float
+        The total simulation time.
+
+    cfl : float
+        Courant-Friedichs-Levy number, dt = cfl * dx / max|u| at every step.
+        
+        Stability Condition:
+            0< cfl <= 1
+    
+    f : function
+        The initial condition function, which defines the initial profile of the solution.
+
+    t0 : float
+        initial simulation time.
+
+    sns : int
+        Snapshot step to save the simulation. The final time is always saved.
+    
+    path_to_save : str
+        path to save the simulation. Name will be burgers1D-<method>
+
+    asynchronous : bool
+        Write the snapshots from a background thread.
+
+    backend : str
+        Output store: "netcdf", "npy" (memory-mapped .npy directory) or "memory".
+
+    layout : dict
+        Storage options of the variables passed to NcFile.addVars, e.g. {"time_first": True,
+        "zlib": True, "complevel": 4} for the time-major compressed layout. The "npy" and
+        "memory" backends ignore them.
+
+    integrator : str
+        Time integrator of time_integration.SSPRK: "euler", "ssprk2" or "ssprk3".
+
+    profile : bool or profiling.Stats
+        Time the phases rhs (ghost cells, fluxes and their differences), dt and save,
+        returned as (result, stats).
+
+    Returns:
+    --------
+    str
+        The file path where the simulation results are saved (the MemoryStore
+        for the "memory" backend).
+    """
+
+    if (x0 >= xf):
+        raise RuntimeError("Imposible Domain - xf must be greater than x0")
+
+    if (not (0 < cfl and  cfl <= 1)):
+        raise RuntimeError("Unstable method - CFL condition not satisfied")
+
+    if (method_name not in _FLUXES):
+        raise RuntimeError("404 - Method Not Found")
+
+    flux = _FLUXES[method_name]
+    x = np.linspace(x0, xf, nx)
+    dx = (xf - x0) / (nx - 1)
+
+    # State with one transmissive ghost cell at each side, fluxes at the nx + 1 interfaces
+    U = np.empty(nx + 2)
+    u = U[1:-1]
+    u[:] = f(x)
+    F = np.empty(nx + 1)
+    tmp = np.empty(nx + 1)
+    ul, ur = U[:-1], U[1:]
+
+    def rhs(t, U, L):
+        U[0] = U[1]
+        U[-1] = U[-2]
+        flux(ul, ur, F, tmp)
+
+        np.subtract(F[:-1], F[1:], out=L[1:-1])
+        L[1:-1] /= dx
+        L[0] = L[-1] = 0
+
+    def stable_dt(U):
+        speed = max(abs(u.max()), abs(u.min()))
+        return np.inf if speed == 0 else cfl * dx / speed
+
+    stats = profiling.stats_for(profile)
+    stable_dt = stats.wrap("dt", stable_dt)
+    stepper = SSPRK(stats.wrap("rhs", rhs), U, integrator)
+
+    speed = max(abs(u.max()), abs(u.min()))
+    capacity = (int((T - t0) * speed / (cfl * dx)) + 1) // sns + 2 if speed > 0 else 2
+
+    # Info
+    info = f" Model: Burgers / Method: {method_name} / Time integrator: {integrator} / Dimension: 1D / Mesh: [{x0}, {xf}] / dx: {dx} / Interval Time: [{t0}, {T}] / CFL: {cfl} "
+
+    full_path = os.path.join(path_to_save, f"burgers1D-{method_name}")
+    with open_output(backend, full_path, capacity, title=f'Burgers simulation by method {method_name}', description=info, author = os.getenv("AUTHOR"), institution = os.getenv("INSTITUTION"), source = os.getenv("REPO_URL"), references ='LeVeque, Randall J.: Numerical Methods for Conservation Laws 1992', asynchronous = asynchronous) as ncf:
+        ncf.addCoords({'x': x})
+        ncf.addVars(['u'], **(layout or {}))
+
+        save = stats.wrap("save", ncf.save)
+
+        # Save initial condition
+        save(t0, {"u": u})
+
+        ks = 1
+        def snapshot(t, U):
+            nonlocal ks
+            save(t, {"u": u})
+            ks += 1
+
+        # CFL-adaptive time step, the last one lands on T
+        k = stepper.integrate(U, t0, T, stable_dt=stable_dt, sns=sns, callback=snapshot)
+
+        profiling.write_attrs(stats, ncf)
+
+    info += f"/ Total iterations: {k} / Iterations saved: {ks-1}\n "
+
+    full_path = ncf.filepath
+
+    print(f"Simulation finished, {output_summary(ncf)}, details:")
+    print(info.replace("/", "\n"))
+
+    result = ncf if backend == "memory" else full_path
+    return (result, stats) if stats else result
+
+def select_method(method_name):
+    def method(x0: float, xf: float, nx: int, T: float, cfl: float, f,
+               t0: float = 0, sns: int = 1, path_to_save: str = "simulations", asynchronous: bool = False, backend: str = "netcdf", integrator: str = "euler", profile = None, layout: dict = None) -> str:
+        """
+        Solves the Burgers 1D equation using the finite volume method and saves the results.
+
+        Parameters:
+        -----------
+        x0 : float
+            The initial spatial coordinate (center of the first cell).
+
+        xf : float
+            The final spatial coordinate (center of the last cell).
+
+        nx : int
+            The number of cells.
+
+        T : float
+            The total simulation time.
+
+        cfl : float
+            Courant-Friedrichs-Levy number, dt = cfl * dx / max|u| at every step.
+
+        f : function
+            The initial condition function, which defines the initial profile of the solution.
+
+        t0 : float
+            initial simulation time.
+
+        sns : int
+            Snapshot step to save the simulation. The final time is always saved.
+
+        path_to_save : str
+            Path to save the simulation. Name will be burgers1D-<method>.
+
+        asynchronous : bool
+            Write the snapshots from a background thread.
+
+        backend : str
+            Output store: "netcdf", "npy" (memory-mapped .npy directory) or "memory".
+
+        layout : dict
+            Storage options of the variables passed to NcFile.addVars, e.g. {"time_first": True,
+            "zlib": True, "complevel": 4} for the time-major compressed layout. The "npy" and
+            "memory" backends ignore them.
+
+        integrator : str
+            Time integrator: "euler", "ssprk2" or "ssprk3".
+
+        profile : bool or profiling.Stats
+            Time the phases of the run, returned as (result, stats).
+
+        Returns:
+        --------
+        str
+            The file path where the simulation results are saved.
+        """
+        return _finite_volume(method_name, x0, xf, nx, T, cfl, f, t0, sns, path_to_save, asynchronous, backend, integrator, profile, layout)
+
+    method.__name__ = method_name
+    return method
+
+# Finite Volume Methods
+godunov = select_method("godunov")
+engquist_osher = select_method("engquist_osher")
+rusanov = select_method("rusanov")
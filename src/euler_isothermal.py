@@ -2,7 +2,575 @@
 
 import plotly.graph_objects as go
 import numpy as np
+import initial_conditions
+from ncfiles import open_output, output_summary
+from time_integration import SSPRK
+import profiling
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
 
 #
 # Euler Isothermal 1D 
 #
+#   rho_t + m_x = 0
+#   m_t + (m^2 / rho + c^2 rho)_x = 0
+#
+# The state is one contiguous (2, nx) array q = (rho, m), fluxes are computed for every
+# interface at once into preallocated (2, nx + 1) buffers.
+#
+
+class _Workspace:
+    """
+    Preallocated buffers of the interface fluxes for n interfaces.
+    """
+    def __init__(self, n):
+        self.FL = np.empty((2, n))
+        self.FR = np.empty((2, n))
+        self.D = np.empty((2, n))
+        self.w1 = np.empty(n)
+        self.w2 = np.empty(n)
+        self.w3 = np.empty(n)
+        self.w4 = np.empty(n)
+
+def _physical_flux(q, c, out, tmp):
+    """
+    f(q) = (m, m^2 / rho + c^2 rho).
+    """
+    out[0] = q[1]
+    np.multiply(q[1], q[1], out=out[1])
+    out[1] /= q[0]
+    np.multiply(q[0], c * c, out=tmp)
+    out[1] += tmp
+    return out
+
+def _flux_rusanov(qL, qR, c, out, ws):
+    """
+    Rusanov flux: (f(qL) + f(qR)) / 2 - (max(|uL|, |uR|) + c) (qR - qL) / 2.
+    """
+    _physical_flux(qL, c, ws.FL, ws.w1)
+    _physical_flux(qR, c, ws.FR, ws.w1)
+
+    np.divide(qL[1], qL[0], out=ws.w1)
+    np.abs(ws.w1, out=ws.w1)
+    np.divide(qR[1], qR[0], out=ws.w2)
+    np.abs(ws.w2, out=ws.w2)
+    np.maximum(ws.w1, ws.w2, out=ws.w1)
+    ws.w1 += c
+
+    np.add(ws.FL, ws.FR, out=out)
+    np.subtract(qR, qL, out=ws.D)
+    ws.D *= ws.w1
+    out -= ws.D
+    out *= 0.5
+    return out
+
+def _flux_hll(qL, qR, c, out, ws):
+    """
+    HLL flux with wave speeds SL = min(uL, uR) - c and SR = max(uL, uR) + c,
+    clipped to SL <= 0 <= SR so the upwind cases need no branches.
+    """
+    _physical_flux(qL, c, ws.FL, ws.w1)
+    _physical_flux(qR, c, ws.FR, ws.w1)
+
+    np.divide(qL[1], qL[0], out=ws.w1)
+    np.divide(qR[1], qR[0], out=ws.w2)
+    np.minimum(ws.w1, ws.w2, out=ws.w3)
+    ws.w3 -= c
+    np.minimum(ws.w3, 0, out=ws.w3)
+    np.maximum(ws.w1, ws.w2, out=ws.w4)
+    ws.w4 += c
+    np.maximum(ws.w4, 0, out=ws.w4)
+
+    # (SR f(qL) - SL f(qR) + SL SR (qR - qL)) / (SR - SL)
+    np.multiply(ws.FL, ws.w4, out=out)
+    np.multiply(ws.FR, ws.w3, out=ws.D)
+    out -= ws.D
+    np.subtract(qR, qL, out=ws.D)
+    ws.D *= ws.w3
+    ws.D *= ws.w4
+    out += ws.D
+    np.subtract(ws.w4, ws.w3, out=ws.w1)
+    out /= ws.w1
+    return out
+
+def _flux_roe(qL, qR, c, out, ws):
+    """
+    Roe flux with the isothermal Roe average u = (sqrt(rhoL) uL + sqrt(rhoR) uR) / (sqrt(rhoL) + sqrt(rhoR)),
+    eigenvalues u -+ c and eigenvectors (1, u -+ c).
+    """
+    _physical_flux(qL, c, ws.FL, ws.w1)
+    _physical_flux(qR, c, ws.FR, ws.w1)
+
+    # Roe average velocity
+    np.sqrt(qL[0], out=ws.w1)
+    np.sqrt(qR[0], out=ws.w2)
+    np.divide(qL[1], ws.w1, out=ws.w3)
+    np.divide(qR[1], ws.w2, out=ws.w4)
+    ws.w3 += ws.w4
+    ws.w1 += ws.w2
+    ws.w3 /= ws.w1
+    u = ws.w3
+
+    # Wave strengths alpha1 = ((u + c) drho - dm) / 2c, alpha2 = (dm - (u - c) drho) / 2c
+    np.subtract(qR, qL, out=ws.D)
+    np.add(u, c, out=ws.w1)
+    ws.w1 *= ws.D[0]
+    ws.w1 -= ws.D[1]
+    np.subtract(u, c, out=ws.w2)
+    ws.w2 *= ws.D[0]
+    np.subtract(ws.D[1], ws.w2, out=ws.w2)
+
+    # |lambda_k| alpha_k, the 1 / 2c factor is applied once at the end
+    np.subtract(u, c, out=ws.w4)
+    np.abs(ws.w4, out=ws.w4)
+    ws.w1 *= ws.w4
+    np.add(u, c, out=ws.w4)
+    np.abs(ws.w4, out=ws.w4)
+    ws.w2 *= ws.w4
+
+    # Dissipation sum_k |lambda_k| alpha_k r_k
+    np.add(ws.w1, ws.w2, out=ws.D[0])
+    np.subtract(u, c, out=ws.w4)
+    np.multiply(ws.w1, ws.w4, out=ws.D[1])
+    np.add(u, c, out=ws.w4)
+    ws.w4 *= ws.w2
+    ws.D[1] += ws.w4
+    ws.D *= 1 / (2 * c)
+
+    np.add(ws.FL, ws.FR, out=out)
+    out -= ws.D
+    out *= 0.5
+    return out
+
+_FLUXES = {"rusanov": _flux_rusanov, "hll": _flux_hll, "roe": _flux_roe}
+
+def _max_speed(q, c, tmp):
+    """
+    max(|u| + c) over the cells.
+    """
+    np.divide(q[1], q[0], out=tmp)
+    return max(abs(tmp.max()), abs(tmp.min())) + c
+
+def riemann(ql, qr, split=0):
+    """
+    Riemann initial value problem for the state (rho, m), as initial_conditions.riemann
+    for every component.
+
+    Returns:
+    --------
+    (function, function)
+        Initial density and momentum.
+    """
+    return initial_conditions.riemann(ql[0], qr[0], split), initial_conditions.riemann(ql[1], qr[1], split)
+
+def _wave_curve(rho, rhoK, c):
+    """
+    Velocity jump f_K(rho) across the wave connecting rhoK to rho, and its derivative
+    with respect to log(rho): shock c (rho - rhoK) / sqrt(rho rhoK) if rho > rhoK,
+    rarefaction c log(rho / rhoK) otherwise.
+    """
+    shock = rho > rhoK
+    root = np.sqrt(rho * rhoK)
+    f = np.where(shock, c * (rho - rhoK) / root, c * np.log(rho / rhoK))
+    df = np.where(shock, c * (rho + rhoK) / (2 * root), c)
+    return f, df
+
+def exact_riemann(c:float, ql, qr, tol:float = 1e-12, max_iterations:int = 50):
+    """
+    Middle state of a batch of isothermal Riemann problems.
+
+    Solves f_L(rho*) + f_R(rho*) + uR - uL = 0 by Newton iterations in log(rho*) for all
+    problems at once, starting from the two-rarefaction solution.
+
+    Parameters:
+    -----------
+    c : float
+        The sound speed.
+
+    ql, qr : array of shape (2, ...)
+        Left and right states (rho, m), any batch shape.
+
+    Returns:
+    --------
+    (array, array)
+        rho* and u* with the batch shape.
+    """
+    rhoL, rhoR = np.asarray(ql[0], dtype=float), np.asarray(qr[0], dtype=float)
+    uL, uR = np.asarray(ql[1]) / rhoL, np.asarray(qr[1]) / rhoR
+
+    if (np.any(rhoL <= 0) or np.any(rhoR <= 0)):
+        raise RuntimeError("Density must be positive")
+
+    z = 0.5 * (np.log(rhoL) + np.log(rhoR)) + (uL - uR) / (2 * c)
+    for _ in range(max_iterations):
+        rho = np.exp(z)
+        fL, dfL = _wave_curve(rho, rhoL, c)
+        fR, dfR = _wave_curve(rho, rhoR, c)
+        dz = (fL + fR + uR - uL) / (dfL + dfR)
+        z = z - dz
+        if np.all(np.abs(dz) < tol):
+            break
+    else:
+        raise RuntimeError("Exact Riemann solver did not converge")
+
+    rho = np.exp(z)
+    fL, _ = _wave_curve(rho, rhoL, c)
+    fR, _ = _wave_curve(rho, rhoR, c)
+    u = 0.5 * (uL - fL + uR + fR)
+
+    return rho, u
+
+def sample_riemann(c:float, ql, qr, star, xi):
+    """
+    Solution (rho, m) of the isothermal Riemann problems at xi = (x - split) / t.
+
+    ql, qr, the middle states star = (rho*, u*) of `exact_riemann` and xi are broadcast
+    together, so a whole x-t grid (or batch) is sampled in one pass.
+    """
+    rhoL, rhoR = np.asarray(ql[0], dtype=float), np.asarray(qr[0], dtype=float)
+    uL, uR = np.asarray(ql[1]) / rhoL, np.asarray(qr[1]) / rhoR
+    rho_s, u_s = star
+
+    # Left of the contact: 1-shock or 1-rarefaction (u + c log(rho) constant)
+    with np.errstate(over='ignore'):
+        fan_rho_L = rhoL * np.exp((uL - xi - c) / c)
+        fan_rho_R = rhoR * np.exp((xi - c - uR) / c)
+
+    shock_L = rho_s > rhoL
+    head_L = np.where(shock_L, uL - c * np.sqrt(rho_s / rhoL), uL - c)
+    tail_L = np.where(shock_L, head_L, u_s - c)
+    rho_left = np.where(xi < head_L, rhoL, np.where(xi > tail_L, rho_s, fan_rho_L))
+    u_left = np.where(xi < head_L, uL, np.where(xi > tail_L, u_s, xi + c))
+
+    # Right of the contact: 2-shock or 2-rarefaction (u - c log(rho) constant)
+    shock_R = rho_s > rhoR
+    head_R = np.where(shock_R, uR + c * np.sqrt(rho_s / rhoR), uR + c)
+    tail_R = np.where(shock_R, head_R, u_s + c)
+    rho_right = np.where(xi > head_R, rhoR, np.where(xi < tail_R, rho_s, fan_rho_R))
+    u_right = np.where(xi > head_R, uR, np.where(xi < tail_R, u_s, xi - c))
+
+    left = xi < u_s
+    rho = np.where(left, rho_left, rho_right)
+    u = np.where(left, u_left, u_right)
+
+    return rho, rho * u
+
+def exact_solution(x0:float, xf:float, nx:int, T:float, nt:int, c:float, ql, qr, split:float = 0, sns:int = 1, path_to_save="simulations", asynchronous:bool = False, backend:str = "netcdf", times = None, block_bytes:int = 2**25, layout:dict = None):
+    """
+    Exact solution of the isothermal Euler Riemann problem riemann(ql, qr, split) and saves the results.
+
+    Parameters:
+    -----------
+    x0 : float
+        The initial spatial coordinate (left boundary of the domain).
+    
+    xf : float
+        The final spatial coordinate (right boundary of the domain).
+    
+    nx : int
+        The number of spatial grid points.
+    
+    T : float
+        The total simulation time.
+    
+    nt : int
+        The number of time steps.
+
+    c : float
+        The sound speed.
+
+    ql, qr : (float, float)
+        Left and right states (rho, m).
+
+    split : float
+        Position of the initial discontinuity.
+
+    sns : int
+        snapshot step to save simulation.
+    
+    path_to_save : str
+        path to save the simulation. Name will be euler_isothermal1D-exact
+
+    asynchronous : bool
+        Write the snapshots from a background thread.
+
+    backend : str
+        Output store: "netcdf", "npy" (memory-mapped .npy directory) or "memory".
+
+    layout : dict
+        Storage options of the variables passed to NcFile.addVars, e.g. {"time_first": True,
+        "zlib": True, "complevel": 4} for the time-major compressed layout. The "npy" and
+        "memory" backends ignore them.
+
+    times : array of float
+        Explicit output times. By default dt * k for every k multiple of sns, with dt = T / nt.
+
+    block_bytes : int
+        Memory bound of the (n_snapshots, nx) blocks sampled and written at once.
+
+    Returns:
+    --------
+    str
+        The file path where the simulation results are saved (the MemoryStore
+        for the "memory" backend).
+    """
+
+    x = np.linspace(x0, xf, nx)
+    dt = T / nt
+
+    if times is None:
+        times = dt * np.arange(0, nt + 1, sns)
+    times = np.atleast_1d(np.asarray(times, dtype=float))
+    block = max(1, block_bytes // (8 * nx))
+
+    star = exact_riemann(c, ql, qr)
+
+    info = f"Exact solution of isothermal Euler Riemann problem / Sound speed: {c} / rho*: {float(star[0])} / u*: {float(star[1])}"
+
+    full_path = os.path.join(path_to_save, "euler_isothermal1D-exact")
+    with open_output(backend, full_path, len(times), title='Isothermal Euler simulation by exact Riemann solver', description=info, author = os.getenv("AUTHOR"), institution = os.getenv("INSTITUTION"), source = os.getenv("REPO_URL"), references ='Toro, E. F.: Riemann Solvers and Numerical Methods for Fluid Dynamics 2009', asynchronous = asynchronous) as ncf:
+        ncf.addCoords({"x": x})
+        ncf.addVars(['rho', 'm'], **(layout or {}))
+
+        for start in range(0, len(times), block):
+            t = times[start:start + block, None]
+            # At t = 0 the side of the split decides the state
+            with np.errstate(divide='ignore', invalid='ignore'):
+                xi = np.where(t > 0, (x - split) / t, np.where(x <= split, -np.inf, np.inf))
+            rho, m = sample_riemann(c, ql, qr, star, xi)
+            ncf.saveBlock(times[start:start + block], {"rho": rho, "m": m})
+
+    full_path = ncf.filepath
+
+    print(f"Simulation finished, {output_summary(ncf)}, details:")
+    print(info.replace("/ ", "\n"))
+
+    return ncf if backend == "memory" else full_path
+
+def _finite_volume(method_name:str, x0:float, xf:float, nx:int, T:float, cfl:float, c:float, frho, fm, t0:float = 0, sns:int = 1, path_to_save="simulations", asynchronous:bool = False, backend:str = "netcdf", integrator:str = "euler", profile = None, layout:dict = None):
+    """
+    Solves the isothermal Euler 1D equations with a conservative finite volume method
+    and saves the results.
+
+    Parameters:
+    -----------
+    method_name : str
+        Numerical flux: "rusanov", "hll" or "roe".
+
+    x0 : float
+        The initial spatial coordinate (center of the first cell).
+    
+    xf : float
+        The final spatial coordinate (center of the last cell).
+    
+    nx : int
+        The number of cells.
+    
+    T : float
+        The total simulation time.
+
+    cfl : float
+        Courant-Friedichs-Levy number, dt = cfl * dx / max(|u| + c) at every step.
+        
+        Stability Condition:
+            0< cfl <= 1
+
+    c : float
+        The sound speed.
+    
+    frho : function
+        Initial density.
+
+    fm : function
+        Initial momentum rho * u.
+
+    t0 : float
+        initial simulation time.
+
+    sns : int
+        Snapshot step to save the simulation. The final time is always saved.
+    
+    path_to_save : str
+        path to save the simulation. Name will be euler_isothermal1D-<method>
+
+    asynchronous : bool
+        Write the snapshots from a background thread.
+
+    backend : str
+        Output store: "netcdf", "npy" (memory-mapped .npy directory) or "memory".
+
+    layout : dict
+        Storage options of the variables passed to NcFile.addVars, e.g. {"time_first": True,
+        "zlib": True, "complevel": 4} for the time-major compressed layout. The "npy" and
+        "memory" backends ignore them.
+
+    integrator : str
+        Time integrator of time_integration.SSPRK: "euler", "ssprk2" or "ssprk3".
+
+    profile : bool or profiling.Stats
+        Time the phases rhs (ghost cells, fluxes and their differences), dt and save,
+        returned as (result, stats).
+
+    Returns:
+    --------
+    str
+        The file path where the simulation results are saved (the MemoryStore
+        for the "memory" backend).
+    """
+
+    if (x0 >= xf):
+        raise RuntimeError("Imposible Domain - xf must be greater than x0")
+
+    if (not (0 < cfl and  cfl <= 1)):
+        raise RuntimeError("Unstable method - CFL condition not satisfied")
+
+    if (c <= 0):
+        raise RuntimeError("Sound speed must be positive")
+
+    if (method_name not in _FLUXES):
+        raise RuntimeError("404 - Method Not Found")
+
+    flux = _FLUXES[method_name]
+    x = np.linspace(x0, xf, nx)
+    dx = (xf - x0) / (nx - 1)
+
+    # State (rho, m) with one transmissive ghost cell at each side
+    Q = np.empty((2, nx + 2))
+    q = Q[:, 1:-1]
+    q[0] = frho(x)
+    q[1] = fm(x)
+
+    if (np.any(q[0] <= 0)):
+        raise RuntimeError("Initial density must be positive")
+
+    F = np.empty((2, nx + 1))
+    ws = _Workspace(nx + 1)
+    qL, qR = Q[:, :-1], Q[:, 1:]
+
+    def rhs(t, Q, L):
+        Q[:, 0] = Q[:, 1]
+        Q[:, -1] = Q[:, -2]
+        flux(qL, qR, c, F, ws)
+
+        np.subtract(F[:, :-1], F[:, 1:], out=L[:, 1:-1])
+        L[:, 1:-1] /= dx
+        L[:, 0] = L[:, -1] = 0
+
+    def stable_dt(Q):
+        return cfl * dx / _max_speed(q, c, ws.w1[:nx])
+
+    stats = profiling.stats_for(profile)
+    stable_dt = stats.wrap("dt", stable_dt)
+    stepper = SSPRK(stats.wrap("rhs", rhs), Q, integrator)
+
+    speed = _max_speed(q, c, ws.w1[:nx])
+    capacity = (int((T - t0) * speed / (cfl * dx)) + 1) // sns + 2
+
+    # Info
+    info = f" Model: Euler Isothermal / Method: {method_name} / Time integrator: {integrator} / Dimension: 1D / Mesh: [{x0}, {xf}] / dx: {dx} / Interval Time: [{t0}, {T}] / CFL: {cfl} / Sound speed: {c} "
+
+    full_path = os.path.join(path_to_save, f"euler_isothermal1D-{method_name}")
+    with open_output(backend, full_path, capacity, title=f'Isothermal Euler simulation by method {method_name}', description=info, author = os.getenv("AUTHOR"), institution = os.getenv("INSTITUTION"), source = os.getenv("REPO_URL"), references ='Toro, E. F.: Riemann Solvers and Numerical Methods for Fluid Dynamics 2009', asynchronous = asynchronous) as ncf:
+        ncf.addCoords({'x': x})
+        ncf.addVars(['rho', 'm'], **(layout or {}))
+
+        save = stats.wrap("save", ncf.save)
+
+        # Save initial condition
+        save(t0, {"rho": q[0], "m": q[1]})
+
+        ks = 1
+        def snapshot(t, Q):
+            nonlocal ks
+            save(t, {"rho": q[0], "m": q[1]})
+            ks += 1
+
+        # CFL-adaptive time step, the last one lands on T
+        k = stepper.integrate(Q, t0, T, stable_dt=stable_dt, sns=sns, callback=snapshot)
+
+        profiling.write_attrs(stats, ncf)
+
+    info += f"/ Total iterations: {k} / Iterations saved: {ks-1}\n "
+
+    full_path = ncf.filepath
+
+    print(f"Simulation finished, {output_summary(ncf)}, details:")
+    print(info.replace("/", "\n"))
+
+    result = ncf if backend == "memory" else full_path
+    return (result, stats) if stats else result
+
+def select_method(method_name):
+    def method(x0: float, xf: float, nx: int, T: float, cfl: float, c: float, frho, fm,
+               t0: float = 0, sns: int = 1, path_to_save: str = "simulations", asynchronous: bool = False, backend: str = "netcdf", integrator: str = "euler", profile = None, layout: dict = None) -> str:
+        """
+        Solves the isothermal Euler 1D equations using the finite volume method and saves the results.
+
+        Parameters:
+        -----------
+        x0 : float
+            The initial spatial coordinate (center of the first cell).
+
+        xf : float
+            The final spatial coordinate (center of the last cell).
+
+        nx : int
+            The number of cells.
+
+        T : float
+            The total simulation time.
+
+        cfl : float
+            Courant-Friedrichs-Levy number, dt = cfl * dx / max(|u| + c) at every step.
+
+        c : float
+            The sound speed.
+
+        frho : function
+            Initial density.
+
+        fm : function
+            Initial momentum rho * u.
+
+        t0 : float
+            initial simulation time.
+
+        sns : int
+            Snapshot step to save the simulation. The final time is always saved.
+
+        path_to_save : str
+            Path to save the simulation. Name will be euler_isothermal1D-<method>.
+
+        asynchronous : bool
+            Write the snapshots from a background thread.
+
+        backend : str
+            Output store: "netcdf", "npy" (memory-mapped .npy directory) or "memory".
+
+        layout : dict
+            Storage options of the variables passed to NcFile.addVars, e.g. {"time_first": True,
+            "zlib": True, "complevel": 4} for the time-major compressed layout. The "npy" and
+            "memory" backends ignore them.
+
+        integrator : str
+            Time integrator: "euler", "ssprk2" or "ssprk3".
+
+        profile : bool or profiling.Stats
+            Time the phases of the run, returned as (result, stats).
+
+        Returns:
+        --------
+        str
+            The file path where the simulation results are saved.
+        """
+        return _finite_volume(method_name, x0, xf, nx, T, cfl, c, frho, fm, t0, sns, path_to_save, asynchronous, backend, integrator, profile, layout)
+
+    method.__name__ = method_name
+    return method
+
+# Finite Volume Methods
+rusanov = select_method("rusanov")
+hll = select_method("hll")
+roe = select_method("roe")
@@ -11,63 +11,146 @@ def _finalize_output(f, isscalar):
     """Return scalar if original input was scalar."""
     return f.item() if isscalar else f
 
-def f1(x):
+class PiecewisePolynomial:
     """
+    Piecewise polynomial function given by its breakpoints and the coefficients of every piece.
+
+    Evaluated with one np.searchsorted and Horner's rule, pieces are located in a single
+    pass and the work buffers are reused between calls with the same number of points.
     """
-    x, isscalar = _prepare_input(x)
-    f = np.zeros(len(x))
-    f[x < 0] = 1.0
-    xp_mask = (0 <= x) & (x <= 2)
-    xp = x[xp_mask]
-    f[xp_mask] = 1 - 0.125 * xp**2 * (3 - xp)
-    f[x > 2] = 0.5
-    return _finalize_output(f, isscalar)
 
-def f2(x):
+    def __init__(self, breakpoints, coefficients, right_closed=None):
+        """
+        Parameters:
+        -----------
+        breakpoints : list of float
+            Sorted breakpoints b_0 < ... < b_{m-1}.
+
+        coefficients : list of lists
+            m + 1 polynomials in x, highest degree first as np.polyval. Piece i
+            covers (b_{i-1}, b_i).
+
+        right_closed : list of bool
+            Whether each breakpoint belongs to the piece on its left (x <= b_i)
+            instead of the one on its right (b_i <= x). Default False.
+        """
+        breakpoints = np.asarray(breakpoints, dtype=float)
+        if len(coefficients) != len(breakpoints) + 1:
+            raise ValueError("A piecewise polynomial needs one more piece than breakpoints")
+
+        if right_closed is None:
+            right_closed = [False] * len(breakpoints)
+
+        # x <= b is the same as x < nextafter(b), so one searchsorted handles both sides
+        self.breakpoints = np.where(right_closed, np.nextafter(breakpoints, np.inf), breakpoints)
+        if np.any(np.diff(self.breakpoints) <= 0):
+            raise ValueError("Breakpoints must be increasing")
+
+        degree = max(len(c) for c in coefficients)
+        self.coefficients = np.zeros((degree, len(coefficients)))
+        for i, c in enumerate(coefficients):
+            self.coefficients[degree - len(c):, i] = c
+
+        self._work = None
+
+    def __repr__(self):
+        return f"PiecewisePolynomial(breakpoints={self.breakpoints.tolist()}, degree={len(self.coefficients) - 1})"
+
+    def _buffer(self, n):
+
+        if self._work is None or len(self._work) != n:
+            self._work = np.empty(n)
+        return self._work
+
+    def __call__(self, x, out=None):
+        """
+        Evaluates the function at x, into out (same shape as x) when given.
+        """
+        x, isscalar = _prepare_input(x)
+        if out is None:
+            out = np.empty(x.shape)
+
+        x = x.ravel()
+        flat = out.reshape(-1)
+
+        if len(x) > 1 and (x[1:] >= x[:-1]).all():
+            # Sorted points (grids): every piece is a contiguous slice
+            cuts = [0, *np.searchsorted(x, self.breakpoints, side='left'), len(x)]
+            for i in range(len(cuts) - 1):
+                if cuts[i] == cuts[i+1]:
+                    continue
+                piece, xp = flat[cuts[i]:cuts[i+1]], x[cuts[i]:cuts[i+1]]
+                coefficients = np.trim_zeros(self.coefficients[:, i], 'f')
+                piece[:] = coefficients[0] if len(coefficients) else 0
+                for c in coefficients[1:]:
+                    piece *= xp
+                    piece += c
+        else:
+            idx = np.searchsorted(self.breakpoints, x, side='right')
+            np.take(self.coefficients[0], idx, out=flat, mode='clip')
+            if len(self.coefficients) > 1:
+                tmp = self._buffer(len(x))
+                for c in self.coefficients[1:]:
+                    flat *= x
+                    np.take(c, idx, out=tmp, mode='clip')
+                    flat += tmp
+
+        return _finalize_output(out, isscalar)
+
+    def on_grid(self, x):
+        """
+        Evaluator for a fixed grid: pieces and coefficients are looked up once,
+        every call is only the Horner pass, into out when given.
+        """
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        idx = np.searchsorted(self.breakpoints, x, side='right')
+        coefficients = self.coefficients[:, idx]
+
+        def evaluate(out=None):
+            if out is None:
+                out = np.empty(len(x))
+            out[:] = coefficients[0]
+            for c in coefficients[1:]:
+                out *= x
+                out += c
+            return out
+
+        return evaluate
+
+_f1 = PiecewisePolynomial([0, 2], [[1.0], [0.125, -0.375, 0, 1], [0.5]], [False, True])
+_f2 = PiecewisePolynomial([0, 2], [[1.0], [0.25, -0.75, 0, 1], [0]], [False, True])
+_f3 = PiecewisePolynomial([-1, 1], [[0.5], [-0.125, 0, 0.375, 0.75], [1]], [False, True])
+_f4 = PiecewisePolynomial([0, 2], [[1.1], [0.05, -0.15, 0, 1.1], [0.9]], [False, True])
+
+def f1(x, out=None):
+    """
+    1 for x < 0, 1 - x^2 (3 - x) / 8 in [0, 2], 0.5 for x > 2.
+    """
+    return _f1(x, out)
+
+def f2(x, out=None):
     """
+    1 for x < 0, (x + 1) (x - 2)^2 / 4 in [0, 2], 0 for x > 2.
     """
-    x, isscalar = _prepare_input(x)
-    f = np.zeros(len(x))
-    f[x < 0] = 1.0
-    xp_mask = (0 <= x) & (x <= 2)
-    xp = x[xp_mask]
-    f[xp_mask] = ((xp + 1) * (xp - 2)**2) * 0.25
-    f[x > 2] = 0
-    return _finalize_output(f, isscalar)
+    return _f2(x, out)
 
-def f3(x):
+def f3(x, out=None):
     """
+    0.5 for x < -1, 0.5 - (x - 2) (x + 1)^2 / 8 in [-1, 1], 1 for x > 1.
     """
-    x, isscalar = _prepare_input(x)
-    f = np.zeros(len(x))
-    f[x < -1] = 0.5
-    xp_mask = (-1 <= x) & (x <= 1)
-    xp = x[xp_mask]
-    f[xp_mask] = 0.5 - ((xp - 2) * (xp + 1)**2) * 0.125
-    f[x > 1] = 1
-    return _finalize_output(f, isscalar)
+    return _f3(x, out)
 
-def f4(x):
+def f4(x, out=None):
     """
+    1.1 for x < 0, 0.05 x^3 - 0.15 x^2 + 1.1 in [0, 2], 0.9 for x > 2.
     """
-    x, isscalar = _prepare_input(x)
-    f = np.zeros(len(x))
-    f[x < 0] = 1.1
-    xp_mask = (0 <= x) & (x <= 2)
-    xp = x[xp_mask]
-    f[xp_mask] = 0.05 * xp**3 - 0.15 * xp**2 + 1.1
-    f[x > 2] = 0.9
-    return _finalize_output(f, isscalar)
+    return _f4(x, out)
 
 def riemann(ul=1, ur=0, split=0):
     """
     Riemann initial value problem
     """
-    def shock(x):
-        x, isscalar = _prepare_input(x)
-        f = np.where(x <= split, ul, ur)
-        return _finalize_output(f, isscalar)
-    return shock
+    return PiecewisePolynomial([split], [[ul], [ur]], [True])
 
 # From Riemann Solvers and Numerical Methods for Flid Dynamics by E. Toro
 def bumping(alpha, beta):
@@ -84,15 +167,5 @@ def square(a, b, bottom=0, height=1):
     """
     """
     if (b < a):
-        def step(x):
-            x, isscalar = _prepare_input(x)
-            f = np.zeros(len(x))
-            return _finalize_output(f, isscalar)
-    else:
-        def step(x):
-            x, isscalar = _prepare_input(x)
-            f = np.zeros(len(x)) + bottom
-            xp_mask = (a <= x) & (x <= b)
-            f[xp_mask] = height
-            return _finalize_output(f, isscalar)
-    return step
+        return PiecewisePolynomial([], [[0]])
+    return PiecewisePolynomial([a, b], [[bottom], [height], [bottom]], [False, True])
@@ -1,89 +1,775 @@
 # -*- coding: utf-8 -*-
 import netCDF4 as nc
+import json
+import numpy as np
+import threading
+import queue
 import time
 import os
 
+def _chunk_shape(shape, itemsize, chunk_bytes, max_steps):
+    """
+    Chunk shape (t, *coords) of the time first layout for snapshots of the given shape.
+
+    Small snapshots are grouped in time up to chunk_bytes (at most max_steps, one write
+    block), large ones are split along the leading spatial dimensions.
+    """
+    snapshot_bytes = itemsize * int(np.prod(shape))
+
+    if snapshot_bytes <= chunk_bytes:
+        steps = int(min(max(1, chunk_bytes // max(1, snapshot_bytes)), max_steps))
+        return (steps, *shape)
+
+    chunks = list(shape)
+    for i in range(len(chunks)):
+        rest = itemsize * int(np.prod(chunks[i+1:]))
+        if rest >= chunk_bytes:
+            chunks[i] = 1
+        else:
+            chunks[i] = max(1, min(chunks[i], chunk_bytes // rest))
+            break
+
+    return (1, *chunks)
+
+def _value_range(values, current=None):
+    """
+    (min, max) of values ignoring NaN, merged with the current range. None while every value is NaN.
+    """
+    values = np.asarray(values)
+    if values.size == 0:
+        return current
+
+    lo, hi = np.fmin.reduce(values, axis=None), np.fmax.reduce(values, axis=None)
+    if current is not None:
+        lo, hi = np.fmin(lo, current[0]), np.fmax(hi, current[1])
+
+    return None if np.isnan(lo) else (float(lo), float(hi))
+
 class NcFile:
-    def __init__(self, full_path, title='', description = '', author = '', institution = '', source = '', references ='', format_file="NETCDF4"):
+    def __init__(self, full_path, title='', description = '', author = '', institution = '', source = '', references ='', format_file="NETCDF4", buffer_size=16, asynchronous=False, queue_size=8, mode='w'):
         """
         Initializes the NcFile object by creating a NetCDF file.
 
+        The dataset stays open until close() (or the end of a with block). Snapshots
+        are collected in memory and written in blocks of buffer_size time steps.
+
+        With asynchronous=True the writes are done by a background thread: save() copies
+        the snapshot into a queue of queue_size snapshots and returns, blocking only when
+        the queue is full. A writer error is raised by every later save(), join(), flush() and close().
+
+        With mode='a' an existing NcFile dataset is reopened to append snapshots: its
+        coordinates and variables are read back from the file (addCoords and addVars
+        are not called again) and the attributes are kept.
+
+        The range of every variable is tracked while its blocks are written and stored
+        as its actual_range attribute, so readers get the global min/max without a pass
+        over the data.
         """
 
         directory = os.path.dirname(full_path)
         if directory:
             os.makedirs(directory, exist_ok=True)
 
+        if mode not in ('w', 'a'):
+            raise ValueError(f"Unknown mode '{mode}' - use 'w' or 'a'")
+
         self.filepath = full_path
         self.ffile = format_file
-        ncf = nc.Dataset(self.filepath, 'w', self.ffile)
+        self.buffer_size = max(1, int(buffer_size))
+
+        self.coords_names = []
+        self.iter_name = 't'
+        self._buffer = {}
+        self._time_first = {}
+        self._times = np.empty(self.buffer_size)
+        self._count = 0
+        self._written = 0
+        self._ranges = {}
+        self._filled = set()
+
+        self.asynchronous = asynchronous
+        self._queue = queue.Queue(maxsize=max(1, int(queue_size))) if asynchronous else None
+        self._writer = None
+        self._error = None
+
+        if mode == 'a':
+            self.ncf = nc.Dataset(self.filepath, 'a')
+            self.ncf.history = f"{getattr(self.ncf, 'history', '')}\nResumed {time.ctime(time.time())}".lstrip()
+            self._restore()
+            return
+
+        self.ncf = nc.Dataset(self.filepath, 'w', self.ffile)
 
         # Attributes
-        ncf.history = "Created " + time.ctime(time.time())
+        self.ncf.history = "Created " + time.ctime(time.time())
 
         if title:
-            ncf.title = title
+            self.ncf.title = title
         if description:
-            ncf.description = description
+            self.ncf.description = description
         if author:
-            ncf.author = author
+            self.ncf.author = author
         if institution:
-            ncf.institution = institution
+            self.ncf.institution = institution
         if source:
-            ncf.source = source
+            self.ncf.source = source
         if references:
-            ncf.references = references
+            self.ncf.references = references
+
+    def __enter__(self):
+        return self
 
-        ncf.close()
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _restore(self):
+        """
+        Rebuilds the coordinates, the variables and the write position of a reopened dataset.
+        """
+        self.iter_name = next((dim.name for dim in self.ncf.dimensions.values() if dim.isunlimited()), 't')
+        if self.iter_name not in self.ncf.dimensions:
+            return
+
+        for var_name, var in self.ncf.variables.items():
+            if self.iter_name not in var.dimensions or var_name == self.iter_name:
+                continue
+
+            self.coords_names = [dim for dim in var.dimensions if dim != self.iter_name]
+            shape = tuple(len(self.ncf.dimensions[coord_name]) for coord_name in self.coords_names)
+            self._buffer[var_name] = np.empty((self.buffer_size, *shape), dtype=var.dtype)
+            self._time_first[var_name] = var.dimensions[0] == self.iter_name
+            if "actual_range" in var.ncattrs():
+                self._ranges[var_name] = tuple(float(value) for value in var.actual_range)
+
+        self._written = len(self.ncf.dimensions[self.iter_name])
 
     def addCoords(self, spatialCoords, iterName='t', iterUnit = 's'):
 
-        ncf = nc.Dataset(self.filepath, 'a', self.ffile)
-        
-        ncf.createDimension(iterName, None)
-        ncf.createVariable(iterName, "f8", (iterName,)).units = iterUnit
+        self.iter_name = iterName
+        self.ncf.createDimension(iterName, None)
+        self.ncf.createVariable(iterName, "f8", (iterName,)).units = iterUnit
 
         self.coords_names = []
         for coord_name, coord_values in spatialCoords.items():
-            ncf.createDimension(coord_name, len(coord_values))
-            coord_var = ncf.createVariable(coord_name, "f4", (coord_name,))
+            self.ncf.createDimension(coord_name, len(coord_values))
+            coord_var = self.ncf.createVariable(coord_name, "f4", (coord_name,))
             coord_var[:] = coord_values
             coord_var.unit = "unit"
             self.coords_names.append(coord_name)
 
-        ncf.close()
+    def addVars(self, vars, time_first=False, dtype="f4", zlib=False, complevel=4, shuffle=True, least_significant_digit=None, chunk_bytes=2**18):
+        """
+        Creates the simulation variables.
+
+        Parameters:
+        - vars: List of variable names.
+        - time_first: Store as (t, *coords) instead of (*coords, t), so every snapshot
+          is one contiguous write and one frame is read from few chunks.
+        - dtype: Storage type, "f4" or "f8".
+        - zlib, complevel, shuffle: Compression of the variables.
+        - least_significant_digit: Quantize the data to this number of decimal digits
+          before compressing.
+        - chunk_bytes: Target chunk size of the time first layout.
+        """
+        shape = tuple(len(self.ncf.dimensions[coord_name]) for coord_name in self.coords_names)
+        itemsize = np.dtype(dtype).itemsize
 
-    def addVars(self, vars):
-        
-        ncf = nc.Dataset(self.filepath, 'a', self.ffile)
+        if time_first:
+            dimensions = (self.iter_name, *self.coords_names)
+            chunksizes = _chunk_shape(shape, itemsize, chunk_bytes, self.buffer_size)
+        else:
+            dimensions = (*self.coords_names, self.iter_name)
+            chunksizes = None
 
         for var_name in vars:
-            var = ncf.createVariable(var_name, "f4", (*self.coords_names, "t"))
+            var = self.ncf.createVariable(var_name, dtype, dimensions, zlib=zlib, complevel=complevel, shuffle=shuffle, least_significant_digit=least_significant_digit, chunksizes=chunksizes)
             var.units = "unit"
+            self._buffer[var_name] = np.empty((self.buffer_size, *shape), dtype=var.dtype)
+            self._time_first[var_name] = time_first
+
+
+    def addAttrs(self, attrs):
+        """
+        Adds (or overwrites) global attributes of the file.
+        """
+        if self.asynchronous:
+            self.join()
+        self.ncf.setncatts(attrs)
+
+    def getAttrs(self):
+        """
+        Global attributes of the file as a dictionary.
+        """
+        return {attr: self.ncf.getncattr(attr) for attr in self.ncf.ncattrs()}
+
+    def loadSnapshot(self, index=-1):
+        """
+        Snapshot index of the file as (time, {variable_name: numpy_array}), in f8.
+        """
+        self.flush()
+        index = range(self._written)[index]
+
+        vars = {}
+        for var_name in self._buffer:
+            var = self.ncf.variables[var_name]
+            values = var[index] if self._time_first[var_name] else var[..., index]
+            vars[var_name] = np.ma.filled(values, np.nan).astype(float)
+
+        return float(self.ncf.variables[self.iter_name][index]), vars
+
+    def snapshots(self):
+        """
+        Number of snapshots saved so far, in the file and in memory.
+        """
+        self.join()
+        return self._written + self._count
+
+    def rewind(self, count):
+        """
+        Drops the snapshots after the first count ones: the next save() writes snapshot count.
+
+        A NetCDF unlimited dimension cannot shrink, the dropped snapshots stay in the
+        file until they are overwritten. The ranges of the variables are recomputed
+        from the kept snapshots, buffer_size snapshots at a time.
+        """
+        self.flush()
+        if not 0 <= count <= self._written:
+            raise ValueError(f"Cannot rewind to snapshot {count} of {self._written}")
+        self._written = count
+
+        self._ranges = {}
+        for var_name in self._buffer:
+            var = self.ncf.variables[var_name]
+            for start in range(0, count, self.buffer_size):
+                stop = min(start + self.buffer_size, count)
+                values = var[start:stop] if self._time_first[var_name] else var[..., start:stop]
+                self._ranges[var_name] = _value_range(np.ma.filled(values, np.nan), self._ranges.get(var_name))
+
+    def saveCheckpoint(self, step, current_time, vars):
+        """
+        Full precision (f8) copy of the state, overwritten at every call.
+
+        The pending snapshots are written first and the dataset is synced to disk, so
+        the file always holds every snapshot up to the checkpoint.
+
+        Parameters:
+        - step: Time step of the state (int).
+        - current_time: Time of the state (float).
+        - vars: Dictionary {variable_name: numpy_array}, stored as <variable_name>_checkpoint.
+        """
+        self.flush()
 
-        ncf.close()
+        for var_name, var_values in vars.items():
+            name = f"{var_name}_checkpoint"
+            if name not in self.ncf.variables:
+                self.ncf.createVariable(name, "f8", tuple(self.coords_names))
+            self.ncf.variables[name][:] = var_values
 
+        self.ncf.setncatts({"checkpoint_step": int(step), "checkpoint_time": float(current_time), "checkpoint_vars": " ".join(vars)})
+        self._write_ranges()
+        self.ncf.sync()
+
+    def loadCheckpoint(self):
+        """
+        Last checkpoint of the file as (step, time, {variable_name: numpy_array}), None if there is none.
+        """
+        if "checkpoint_step" not in self.ncf.ncattrs():
+            return None
+
+        vars = {var_name: np.array(self.ncf.variables[f"{var_name}_checkpoint"][:], dtype=float) for var_name in self.ncf.checkpoint_vars.split()}
+        return int(self.ncf.checkpoint_step), float(self.ncf.checkpoint_time), vars
 
     def save(self, current_time, vars):
         """
         Save simulation variables for the current iteration.
 
+        The snapshot is copied into the in-memory block, which is written to the
+        file when it is full, on flush() and on close().
+
         Parameters:
         - current_time: Current time of the simulation (float).
         - vars: Dictionary {variable_name: numpy_array}.
         """
-        ncf = nc.Dataset(self.filepath, 'a', format="NETCDF4")
+        for var_name in vars:
+            if var_name not in self._buffer:
+                raise ValueError(f"Variable '{var_name}' not found in the NetCDF file.")
+
+        if not self.asynchronous:
+            self._append(current_time, vars)
+            return
+
+        self._raise_error()
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name=f"NcFile writer {self.filepath}", daemon=True)
+            self._writer.start()
 
-        time_dim = len(ncf.variables["t"])
-        ncf.variables["t"][time_dim] = current_time
+        self._queue.put((current_time, {var_name: np.array(var_values, copy=True) for var_name, var_values in vars.items()}))
+
+    def saveBlock(self, times, vars):
+        """
+        Save several snapshots at once, written with one slice assignment per variable.
+
+        Parameters:
+        - times: Times of the snapshots (1D array).
+        - vars: Dictionary {variable_name: numpy_array of shape (len(times), *coords)}.
+        """
+        for var_name in vars:
+            if var_name not in self._buffer:
+                raise ValueError(f"Variable '{var_name}' not found in the NetCDF file.")
+
+        self.flush()
+
+        start, stop = self._written, self._written + len(times)
+        self.ncf.variables[self.iter_name][start:stop] = times
 
         for var_name, var_values in vars.items():
-            if var_name in ncf.variables:
-                ncf.variables[var_name][..., time_dim] = var_values
+            if self._time_first[var_name]:
+                self.ncf.variables[var_name][start:stop] = var_values
             else:
-                raise ValueError(f"Variable '{var_name}' not found in the NetCDF file.")
-            
-        ncf.close()
+                self.ncf.variables[var_name][..., start:stop] = np.moveaxis(var_values, 0, -1)
+            self._ranges[var_name] = _value_range(var_values, self._ranges.get(var_name))
+
+        self._written = stop
+
+    def _append(self, current_time, vars):
+
+        self._times[self._count] = current_time
+
+        for var_name, block in self._buffer.items():
+            if var_name in vars:
+                block[self._count] = vars[var_name]
+            else:
+                block[self._count] = nc.default_fillvals[block.dtype.str[1:]]
+                self._filled.add(var_name)
+
+        self._count += 1
+        if self._count == self.buffer_size:
+            self._flush()
+
+    def _write_loop(self):
+
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                if self._error is None:
+                    self._append(*item)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+
+        # Sticky, the snapshots queued after the failure were dropped, so every
+        # later save, flush and close raises again
+        if self._error is not None:
+            raise RuntimeError(f"NcFile writer failed on {self.filepath}: {self._error}") from self._error
+
+    def join(self):
+        """
+        Wait until the writer thread has processed every queued snapshot.
+        """
+        if self._writer is not None:
+            self._queue.join()
+        self._raise_error()
+
+    def flush(self):
+        """
+        Write the snapshots collected in memory, one slice assignment per variable.
+        """
+        self.join()
+        self._flush()
+
+    def _flush(self):
+
+        if self._count == 0:
+            return
+
+        start, stop = self._written, self._written + self._count
+        self.ncf.variables[self.iter_name][start:stop] = self._times[:self._count]
+
+        for var_name, block in self._buffer.items():
+            if self._time_first[var_name]:
+                self.ncf.variables[var_name][start:stop] = block[:self._count]
+            else:
+                self.ncf.variables[var_name][..., start:stop] = np.moveaxis(block[:self._count], 0, -1)
+
+            values = block[:self._count]
+            if var_name in self._filled:
+                values = values[values != nc.default_fillvals[block.dtype.str[1:]]]
+            self._ranges[var_name] = _value_range(values, self._ranges.get(var_name))
+
+        self._written = stop
+        self._count = 0
+        self._filled.clear()
+
+    def _write_ranges(self):
+
+        for var_name in self._buffer:
+            var = self.ncf.variables[var_name]
+            value_range = self._ranges.get(var_name)
+            if value_range is not None:
+                var.actual_range = np.array(value_range, dtype=var.dtype)
+            elif "actual_range" in var.ncattrs():
+                var.delncattr("actual_range")
+
+    def close(self):
+        """
+        Flush the pending snapshots and close the dataset.
+        """
+        if self.ncf is None:
+            self._raise_error()
+            return
+
+        try:
+            if self._writer is not None:
+                self._queue.put(None)
+                self._writer.join()
+                self._writer = None
+            self._raise_error()
+            if self.ncf.isopen():
+                self._flush()
+                self._write_ranges()
+        finally:
+            if self.ncf.isopen():
+                self.ncf.close()
+            self.ncf = None
+
+def convert(src_path, dst_path, time_first=True, dtype=None, zlib=False, complevel=4, shuffle=True, least_significant_digit=None, chunk_bytes=2**18, block_size=64):
+    """
+    Copies an existing NcFile dataset into a new file with the given layout.
+
+    Attributes and coordinates are kept, the variables are streamed block_size
+    snapshots at a time. dtype=None keeps the storage type of each variable.
+
+    Returns:
+    --------
+    str
+        The path of the converted file.
+    """
+    src = nc.Dataset(src_path, 'r')
+
+    try:
+        iter_name = next(dim.name for dim in src.dimensions.values() if dim.isunlimited())
+        var_names = [name for name, var in src.variables.items() if iter_name in var.dimensions and name != iter_name]
+        coords_names = [dim for dim in src.variables[var_names[0]].dimensions if dim != iter_name]
+
+        with NcFile(dst_path, format_file=src.data_model, buffer_size=block_size) as ncf:
+            ncf.ncf.setncatts({attr: src.getncattr(attr) for attr in src.ncattrs()})
+            ncf.addCoords({coord_name: src.variables[coord_name][:] for coord_name in coords_names}, iter_name, getattr(src.variables[iter_name], "units", 's'))
+
+            for var_name in var_names:
+                var_dtype = dtype if dtype else src.variables[var_name].dtype.str[1:]
+                ncf.addVars([var_name], time_first, var_dtype, zlib, complevel, shuffle, least_significant_digit, chunk_bytes)
+
+            times = src.variables[iter_name][:]
+            for start in range(0, len(times), block_size):
+                stop = min(start + block_size, len(times))
+                block = {}
+                for var_name in var_names:
+                    var = src.variables[var_name]
+                    axis = var.dimensions.index(iter_name)
+                    block[var_name] = np.moveaxis(np.ma.filled(var[(slice(None),) * axis + (slice(start, stop),)], np.nan), axis, 0)
+
+                for k in range(stop - start):
+                    ncf.save(times[start + k], {var_name: values[k] for var_name, values in block.items()})
+    finally:
+        src.close()
+
+    return dst_path
+
+class NpyStore:
+    def __init__(self, full_path, title='', description = '', author = '', institution = '', source = '', references ='', capacity=64, **options):
+        """
+        Initializes a directory store with the NcFile interface.
+
+        Every coordinate and variable is a .npy file, the variables are preallocated
+        numpy.memmap arrays of shape (capacity, *coords) written in place by save(),
+        and meta.json keeps the attributes, the layout, the number of saved snapshots
+        and the range of every variable.
+        The capacity is doubled when it is exceeded. Other NcFile options are ignored.
+        """
+        os.makedirs(full_path, exist_ok=True)
+
+        self.filepath = full_path
+        self.capacity = max(1, int(capacity))
+        self.attrs = {"history": "Created " + time.ctime(time.time())}
+        for attr, value in (("title", title), ("description", description), ("author", author), ("institution", institution), ("source", source), ("references", references)):
+            if value:
+                self.attrs[attr] = value
+
+        self.coords_names = []
+        self.iter_name = 't'
+        self.iter_unit = 's'
+        self._arrays = {}
+        self._count = 0
+        self._ranges = {}
+        self._write_meta()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def _path(self, name):
+        return os.path.join(self.filepath, f"{name}.npy")
+
+    def _allocate(self, name, shape, dtype):
+        return np.lib.format.open_memmap(self._path(name), mode='w+', dtype=dtype, shape=(self.capacity, *shape))
+
+    def _write_meta(self):
+        meta = {"attrs": self.attrs, "iter_name": self.iter_name, "iter_unit": self.iter_unit,
+                "coords": self.coords_names, "vars": [name for name in self._arrays if name != self.iter_name],
+                "count": self._count, "ranges": {name: value_range for name, value_range in self._ranges.items() if value_range is not None}}
+        with open(os.path.join(self.filepath, "meta.json"), 'w') as meta_file:
+            json.dump(meta, meta_file, indent=2)
+
+    def addCoords(self, spatialCoords, iterName='t', iterUnit = 's'):
+
+        self.iter_name = iterName
+        self.iter_unit = iterUnit
+        self._arrays[iterName] = self._allocate(iterName, (), "f8")
+
+        self.coords_names = []
+        for coord_name, coord_values in spatialCoords.items():
+            np.save(self._path(coord_name), np.asarray(coord_values, dtype="f4"))
+            self.coords_names.append(coord_name)
+
+        self._write_meta()
+
+    def addVars(self, vars, time_first=False, dtype="f4", zlib=False, complevel=4, shuffle=True, least_significant_digit=None, chunk_bytes=2**18):
+        """
+        Creates the simulation variables, with the signature of NcFile.addVars.
+
+        Parameters:
+        - vars: List of variable names.
+        - dtype: Storage type, "f4" or "f8".
+        - time_first, zlib, complevel, shuffle, least_significant_digit, chunk_bytes:
+          Ignored, the store is always (t, *coords) and uncompressed.
+        """
+        shape = tuple(len(np.load(self._path(coord_name), mmap_mode='r')) for coord_name in self.coords_names)
+
+        for var_name in vars:
+            self._arrays[var_name] = self._allocate(var_name, shape, dtype)
+
+        self._write_meta()
+
+    def _grow(self):
+
+        self.flush()
+        self.capacity *= 2
+        for name, old in self._arrays.items():
+            os.replace(self._path(name), self._path(name) + ".old")
+            new = self._allocate(name, old.shape[1:], old.dtype)
+            new[:self._count] = old[:self._count]
+            self._arrays[name] = new
+            del old
+            os.remove(self._path(name) + ".old")
+
+    def addAttrs(self, attrs):
+        """
+        Adds (or overwrites) global attributes, kept in meta.json.
+        """
+        self.attrs.update(attrs)
+        self._write_meta()
+
+    def save(self, current_time, vars):
+        """
+        Save simulation variables for the current iteration, copied into the memmaps.
+        """
+        for var_name in vars:
+            if var_name not in self._arrays or var_name == self.iter_name:
+                raise ValueError(f"Variable '{var_name}' not found in the store.")
+
+        if self._count == self.capacity:
+            self._grow()
+
+        self._arrays[self.iter_name][self._count] = current_time
+        for var_name, var_values in vars.items():
+            self._arrays[var_name][self._count] = var_values
+            self._ranges[var_name] = _value_range(self._arrays[var_name][self._count], self._ranges.get(var_name))
+
+        self._count += 1
+
+    def saveBlock(self, times, vars):
+        """
+        Save several snapshots at once, vars with shape (len(times), *coords).
+        """
+        for var_name in vars:
+            if var_name not in self._arrays or var_name == self.iter_name:
+                raise ValueError(f"Variable '{var_name}' not found in the store.")
+
+        while self._count + len(times) > self.capacity:
+            self._grow()
+
+        start, stop = self._count, self._count + len(times)
+        self._arrays[self.iter_name][start:stop] = times
+        for var_name, var_values in vars.items():
+            self._arrays[var_name][start:stop] = var_values
+            self._ranges[var_name] = _value_range(self._arrays[var_name][start:stop], self._ranges.get(var_name))
+
+        self._count = stop
+
+    def flush(self):
+
+        for array in self._arrays.values():
+            array.flush()
+        self._write_meta()
+
+    def close(self):
+
+        if self._arrays is None:
+            return
+
+        self.flush()
+        self._arrays = None
+
+class MemoryStore:
+    def __init__(self, full_path='', title='', description = '', author = '', institution = '', source = '', references ='', capacity=64, **options):
+        """
+        Initializes an in-memory store with the NcFile interface.
+
+        Snapshots are copied into preallocated arrays of shape (capacity, *coords),
+        doubled when full, and returned by arrays(). Other NcFile options are ignored.
+        """
+        self.filepath = full_path
+        self.capacity = max(1, int(capacity))
+        self.attrs = {"history": "Created " + time.ctime(time.time())}
+        for attr, value in (("title", title), ("description", description), ("author", author), ("institution", institution), ("source", source), ("references", references)):
+            if value:
+                self.attrs[attr] = value
+
+        self.coords = {}
+        self.iter_name = 't'
+        self._arrays = {}
+        self._count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def addCoords(self, spatialCoords, iterName='t', iterUnit = 's'):
+
+        self.iter_name = iterName
+        self._arrays[iterName] = np.empty(self.capacity)
+        self.coords = {coord_name: np.asarray(coord_values) for coord_name, coord_values in spatialCoords.items()}
+
+    def addVars(self, vars, time_first=False, dtype="f4", zlib=False, complevel=4, shuffle=True, least_significant_digit=None, chunk_bytes=2**18):
+        """
+        Creates the simulation variables, with the signature of NcFile.addVars.
+
+        Parameters:
+        - vars: List of variable names.
+        - dtype: Storage type, "f4" or "f8".
+        - time_first, zlib, complevel, shuffle, least_significant_digit, chunk_bytes:
+          Ignored, the store is always (t, *coords) and uncompressed.
+        """
+        shape = tuple(len(coord_values) for coord_values in self.coords.values())
+        for var_name in vars:
+            self._arrays[var_name] = np.empty((self.capacity, *shape), dtype=dtype)
+
+    def addAttrs(self, attrs):
+        """
+        Adds (or overwrites) global attributes.
+        """
+        self.attrs.update(attrs)
+
+    def save(self, current_time, vars):
+        """
+        Save simulation variables for the current iteration, copied into the arrays.
+        """
+        for var_name in vars:
+            if var_name not in self._arrays or var_name == self.iter_name:
+                raise ValueError(f"Variable '{var_name}' not found in the store.")
+
+        if self._count == self.capacity:
+            self._grow()
+
+        self._arrays[self.iter_name][self._count] = current_time
+        for var_name, var_values in vars.items():
+            self._arrays[var_name][self._count] = var_values
+
+        self._count += 1
+
+    def _grow(self):
+
+        self.capacity *= 2
+        for name, old in self._arrays.items():
+            self._arrays[name] = np.empty((self.capacity, *old.shape[1:]), dtype=old.dtype)
+            self._arrays[name][:self._count] = old[:self._count]
+
+    def saveBlock(self, times, vars):
+        """
+        Save several snapshots at once, vars with shape (len(times), *coords).
+        """
+        for var_name in vars:
+            if var_name not in self._arrays or var_name == self.iter_name:
+                raise ValueError(f"Variable '{var_name}' not found in the store.")
+
+        while self._count + len(times) > self.capacity:
+            self._grow()
+
+        start, stop = self._count, self._count + len(times)
+        self._arrays[self.iter_name][start:stop] = times
+        for var_name, var_values in vars.items():
+            self._arrays[var_name][start:stop] = var_values
+
+        self._count = stop
+
+    def arrays(self):
+        """
+        Saved data as {name: array}, variables with shape (snapshots, *coords).
+        """
+        data = dict(self.coords)
+        for name, array in self._arrays.items():
+            data[name] = array[:self._count]
+        return data
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+BACKENDS = {"netcdf": NcFile, "npy": NpyStore, "memory": MemoryStore}
+
+def open_output(backend, full_path, capacity=64, **kwargs):
+    """
+    Creates the output store of a simulation.
+
+    Parameters:
+    - backend: "netcdf" (NcFile, full_path + ".nc"), "npy" (NpyStore, directory full_path)
+      or "memory" (MemoryStore).
+    - full_path: Path without extension.
+    - capacity: Expected number of snapshots, used to preallocate the npy and memory stores.
+    - kwargs: NcFile arguments (title, description, ..., buffer_size, asynchronous, mode).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}' - use one of {list(BACKENDS)}")
 
+    if backend == "netcdf":
+        return NcFile(full_path + ".nc", **kwargs)
 
+    return BACKENDS[backend](full_path, capacity=capacity, **kwargs)
 
+def output_summary(store):
+    """
+    Where the results of a simulation are, for the summary printed by the solvers.
+    """
+    if isinstance(store, MemoryStore):
+        return "results kept in memory"
+    return f"{store.filepath} generated"
@@ -1,20 +1,257 @@
 import os
+import json
+import shutil
+import threading
+import numpy as np
+import netCDF4 as nc
+from collections import OrderedDict
+from contextlib import contextmanager
 import xarray as xr
 import plotly.graph_objects as go
 
-def _scatter(ncfile_path,  iterPos: int, varName: str, dimName: str, iterName: str, line_mode: str = 'markers', line_color:str = 'black', line_width: int = 1, scatterName: str = ""):
+def _open_npy_store(full_path):
+    """
+    Dataset view of an ncfiles.NpyStore directory, the variables stay memory-mapped.
+    """
+    with open(os.path.join(full_path, "meta.json")) as meta_file:
+        meta = json.load(meta_file)
+
+    count = meta["count"]
+    iter_name = meta["iter_name"]
+    load = lambda name: np.load(os.path.join(full_path, f"{name}.npy"), mmap_mode='r')
+
+    coords = {iter_name: (iter_name, load(iter_name)[:count], {"units": meta["iter_unit"]})}
+    for coord_name in meta["coords"]:
+        coords[coord_name] = (coord_name, load(coord_name))
+
+    ranges = meta.get("ranges", {})
+    data_vars = {var_name: ((iter_name, *meta["coords"]), load(var_name)[:count], {"actual_range": ranges[var_name]} if var_name in ranges else {}) for var_name in meta["vars"]}
+
+    return xr.Dataset(data_vars, coords=coords, attrs=meta["attrs"])
+
+class _PooledFile(xr.backends.FileManager):
+    """
+    File manager of a pooled NetCDF dataset: touch() runs before every access, so
+    a read that reopens the file goes back through the LRU of the pool.
+    """
+    def __init__(self, full_path, touch):
+        self._manager = xr.backends.CachingFileManager(nc.Dataset, full_path, mode='r')
+        self.touch = touch
+
+    def acquire(self, needs_lock: bool = True):
+        self.touch()
+        return self._manager.acquire(needs_lock)
+
+    @contextmanager
+    def acquire_context(self, needs_lock: bool = True):
+        self.touch()
+        with self._manager.acquire_context(needs_lock) as file:
+            yield file
+
+    def close(self, needs_lock: bool = True):
+        self._manager.close(needs_lock)
+
+def _open_dataset(full_path, touch = lambda: None):
+    """
+    Opens a NetCDF file or an NpyStore directory as a lazy xarray Dataset.
+
+    Nothing is read until it is indexed, and what is read is not kept (cache=False),
+    so the memory in use is bounded by the selections, not by the file.
+
+    Returns the dataset and a function closing its file. Unlike Dataset.close, it also
+    closes the handle reopened by a read after a previous close. touch() is called
+    before every access to a NetCDF file.
+    """
+    if not os.path.exists(full_path):
+        raise FileNotFoundError(f"File {full_path} not found.")
+
+    try:
+        if os.path.isdir(full_path):
+            dataset = _open_npy_store(full_path)
+            return dataset, dataset.close
+        store = xr.backends.NetCDF4DataStore(_PooledFile(full_path, touch), mode='r')
+        return xr.open_dataset(store, cache=False), store.close
+    except Exception as e:
+        raise RuntimeError(f"Failed to load NetCDF file: {e}")
+
+def _minmax(x, Y, max_points: int):
+    """
+    Min/max decimation of the rows of Y (frames, n) to at most max_points points.
+
+    x is split in max_points // 2 buckets and every bucket keeps its minimum and its
+    maximum, in their order along x, so extrema and shocks stay in place.
+    """
+    n = len(x)
+    width = -(-n // max(1, max_points // 2))
+    buckets = -(-n // width)
+    pad = buckets * width - n
+
+    # Padding and NaN never win the argmin / argmax
+    low = np.pad(np.where(np.isnan(Y), np.inf, Y), ((0, 0), (0, pad)), constant_values=np.inf).reshape(len(Y), buckets, width)
+    high = np.pad(np.where(np.isnan(Y), -np.inf, Y), ((0, 0), (0, pad)), constant_values=-np.inf).reshape(len(Y), buckets, width)
+
+    start = np.arange(buckets) * width
+    i_min = start + low.argmin(axis=2)
+    i_max = start + high.argmax(axis=2)
+
+    index = np.stack([np.minimum(i_min, i_max), np.maximum(i_min, i_max)], axis=2).reshape(len(Y), -1)
+    index = np.minimum(index, n - 1)
+
+    return x[index], np.take_along_axis(Y, index, axis=1)
+
+def _lttb(x, Y, max_points: int):
+    """
+    Largest-Triangle-Three-Buckets decimation of the rows of Y (frames, n) to max_points points.
+
+    The buckets are walked in order, every frame at once: each one keeps the point
+    making the largest triangle with the point kept before and the mean of the next bucket.
+    It follows the visual shape of the curve but may drop a frame's extrema, only
+    "minmax" keeps them.
+    """
+    n = len(x)
+    rows = np.arange(len(Y))
+    every = (n - 2) / (max_points - 2)
+
+    index = np.empty((len(Y), max_points), dtype=int)
+    index[:, 0] = 0
+    index[:, -1] = n - 1
+
+    a = index[:, 0]
+    for i in range(max_points - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        next_lo, next_hi = hi, min(int((i + 2) * every) + 1, n)
+
+        mean_x = x[next_lo:next_hi].mean()
+        mean_y = Y[:, next_lo:next_hi].mean(axis=1)
+        ax, ay = x[a], Y[rows, a]
+
+        area = np.abs((ax - mean_x)[:, None] * (Y[:, lo:hi] - ay[:, None]) - (ax[:, None] - x[lo:hi]) * (mean_y - ay)[:, None])
+        a = lo + np.nan_to_num(area, nan=-1).argmax(axis=1)
+        index[:, i + 1] = a
+
+    return x[index], np.take_along_axis(Y, index, axis=1)
+
+_DECIMATIONS = {"minmax": _minmax, "lttb": _lttb}
+
+def _decimate(x, Y, max_points: int = None, decimation: str = "minmax"):
+    """
+    Rows of Y (frames, n) reduced to at most max_points points each, as (X, Y) of shape (frames, points).
+    Without max_points, or when the grid is already small enough, the data is returned as is,
+    with the shared x of every frame (1D). max_points must be at least 4.
+    """
+    if decimation not in _DECIMATIONS:
+        raise ValueError(f"Unknown decimation '{decimation}' - use one of {list(_DECIMATIONS)}")
+
+    if max_points is not None and max_points < 4:
+        raise ValueError(f"max_points must be at least 4, got {max_points}")
+
+    x = np.asarray(x)
+    Y = np.atleast_2d(Y)
+    if max_points is None or len(x) <= max_points:
+        return x, Y
+
+    return _DECIMATIONS[decimation](x, Y, int(max_points))
+
+class DatasetPool:
+    def __init__(self, max_open: int = 16):
         """
-        Creates a Scatter plot for the given varName at iterPos.
+        Process-wide pool of datasets, shared by NcView, _scatter and the comparisons.
+
+        Datasets are keyed by (absolute path, modification time): a file rewritten by a
+        new simulation is opened again and its stale entry closed. At most max_open
+        NetCDF files are open at a time. Every read of a pooled dataset marks its file
+        as the most recently used one and the least recently used file is closed; its
+        dataset stays in the pool and reopens the file on its next read.
+
+        Views hold their dataset (get(..., hold=True)) until release(); the dataset
+        is closed and forgotten when the last view releases it.
+        """
+        self.max_open = max(1, int(max_open))
+        self._datasets = {}
+        self._refs = {}
+        self._open = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(full_path):
+        # NpyStore directories are rewritten through their meta.json
+        stamp = os.path.join(full_path, "meta.json") if os.path.isdir(full_path) else full_path
+        return full_path, os.path.getmtime(stamp)
+
+    def get(self, ncfile_path, hold: bool = False):
+        """
+        Dataset of ncfile_path (NetCDF file or NpyStore directory), opened only when not
+        in the pool. With hold=True the caller keeps it until release().
         """
         full_path = os.path.abspath(ncfile_path)
-
         if not os.path.exists(full_path):
             raise FileNotFoundError(f"File {full_path} not found.")
-        
-        try:
-            ncf = xr.open_dataset(full_path)
-        except Exception as e:
-            raise RuntimeError(f"Failed to load NetCDF file: {e}")
+        key = self._key(full_path)
+
+        with self._lock:
+            if key not in self._datasets:
+                for stale in [other for other in self._datasets if other[0] == full_path]:
+                    self._drop(stale)
+                self._datasets[key] = _open_dataset(full_path, lambda: self._touch(key))
+                if not os.path.isdir(full_path):
+                    self._touch(key)
+
+            if hold:
+                self._refs[key] = self._refs.get(key, 0) + 1
+
+            return self._datasets[key][0]
+
+    def _touch(self, key):
+
+        with self._lock:
+            if key not in self._datasets:
+                return
+
+            self._open[key] = True
+            self._open.move_to_end(key)
+            while len(self._open) > self.max_open:
+                evicted, _ = self._open.popitem(last=False)
+                self._datasets[evicted][1]()
+
+    def _drop(self, key):
+
+        self._open.pop(key, None)
+        self._refs.pop(key, None)
+        _, close = self._datasets.pop(key)
+        close()
+
+    def release(self, dataset):
+        """
+        Gives back a dataset taken with hold=True, closed when no other view holds it.
+        """
+        with self._lock:
+            for key, (pooled, _) in list(self._datasets.items()):
+                if pooled is dataset:
+                    self._refs[key] = self._refs.get(key, 1) - 1
+                    if self._refs[key] <= 0:
+                        self._drop(key)
+                    return
+
+    def close(self, ncfile_path = None):
+        """
+        Closes and forgets the datasets of ncfile_path, every dataset of the pool by default.
+        """
+        full_path = None if ncfile_path is None else os.path.abspath(ncfile_path)
+
+        with self._lock:
+            for key in [key for key in self._datasets if full_path is None or key[0] == full_path]:
+                self._drop(key)
+
+    def __len__(self):
+        return len(self._open)
+
+POOL = DatasetPool()
+
+def _scatter(ncfile_path,  iterPos: int, varName: str, dimName: str, iterName: str, line_mode: str = 'markers', line_color:str = 'black', line_width: int = 1, scatterName: str = ""):
+        """
+        Creates a Scatter plot for the given varName at iterPos.
+        """
+        ncf = POOL.get(ncfile_path)
 
         x_data = ncf[dimName].values
         y_data = ncf[varName].isel({iterName: iterPos}).values
@@ -39,25 +276,99 @@ def _scatter(ncfile_path,  iterPos: int, varName: str, dimName: str, iterName: s
         return scatter
 
 
+def export(fig, path: str, image_format: str = "png", scale: float = 1):
+    """
+    Writes a figure without showing it, for headless report generation.
+
+    Parameters:
+    - fig: Plotly figure, e.g. NcView.evolution(..., show=False).
+    - path: A ".html" file gets a self-contained page (plotly.js embedded) with the
+      whole animation. Any other path is a directory that gets one image per frame,
+      frame_00000.<image_format>, ..., or a single image when the figure has no frames
+      (needs the kaleido package).
+    - image_format, scale: Image type ("png", "svg", "jpeg", ...) and resolution factor.
+
+    Returns:
+    --------
+    list of str
+        The written files.
+    """
+    directory = path if not path.endswith(".html") else os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if path.endswith(".html"):
+        fig.write_html(path, include_plotlyjs=True, full_html=True, auto_play=False)
+        return [path]
+
+    try:
+        import kaleido
+    except ImportError:
+        raise RuntimeError("Image export needs the kaleido package - pip install kaleido")
+
+    # Static copy: every frame is merged into the first traces, as the animation does
+    still = go.Figure(fig)
+    still.frames = []
+    still.layout.updatemenus = []
+    still.layout.sliders = []
+    title = still.layout.title.text or ""
+
+    files = []
+    for i, frame in enumerate(fig.frames or [None]):
+        if frame is not None:
+            for trace, update in zip(still.data, frame.data):
+                trace.update({key: value for key, value in update.to_plotly_json().items() if key != "type"})
+            still.layout.title.text = f"{title} ({frame.name})" if title else frame.name
+
+        file_path = os.path.join(path, f"frame_{i:05d}.{image_format}")
+        still.write_image(file_path, format=image_format, scale=scale)
+        files.append(file_path)
+
+    return files
+
 class NcView:
 
-    def __init__(self, ncfile_path):
+    def __init__(self, ncfile_path, block_size: int = 64):
         """
-        Load NetCDF file from given path
+        Load NetCDF file (or ncfiles.NpyStore directory) from given path
+
+        The dataset is opened lazily: only the requested frames are read. Passes over
+        a whole variable stream it in blocks of block_size snapshots. It is taken from
+        the process-wide POOL, views and comparisons of the same file share one handle.
         """
         full_path = os.path.abspath(ncfile_path)
 
-        if not os.path.exists(full_path):
-            raise FileNotFoundError(f"File {full_path} not found.")
-        
-        try:
-            self.data = xr.open_dataset(full_path)
-            self.path = full_path
-        except Exception as e:
-            raise RuntimeError(f"Failed to load NetCDF file: {e}")
+        self.data = POOL.get(full_path, hold=True)
+        self.path = full_path
+        self.block_size = max(1, int(block_size))
+        self._ranges = {}
         
         print(f"Loaded: {full_path}")
 
+    def range(self, varName: str = 'u', iterName: str = 't'):
+        """
+        Global (min, max) of varName, NaN and fill values ignored.
+
+        Read from the actual_range attribute stored by ncfiles at write time, otherwise
+        computed in one streaming pass of block_size snapshots. Cached per variable.
+        """
+        if varName in self._ranges:
+            return self._ranges[varName]
+
+        var = self.data[varName]
+        if "actual_range" in var.attrs:
+            lo, hi = np.asarray(var.attrs["actual_range"], dtype=float)
+        else:
+            lo, hi = np.inf, -np.inf
+            n = var.sizes[iterName] if iterName in var.dims else 1
+            for start in range(0, n, self.block_size):
+                block = var.isel({iterName: slice(start, start + self.block_size)}).values if iterName in var.dims else var.values
+                lo = np.fmin(lo, np.fmin.reduce(block, axis=None))
+                hi = np.fmax(hi, np.fmax.reduce(block, axis=None))
+
+        self._ranges[varName] = (float(lo), float(hi))
+        return self._ranges[varName]
+
     ## 1D ##
     def point(self, dimPos: int, iterPos: int, varName: str = 'u',dimName: str = 'x', iterName: str = 't'):
         """
@@ -76,13 +387,25 @@ class NcView:
 
         fig.show()
 
-    def scatter(self,  iterPos: int, varName: str, dimName: str, iterName: str, line_mode: str, line_color: str = 'black', line_width: int = 1, scatterName: str = ""):
+    def scatter(self,  iterPos: int, varName: str, dimName: str, iterName: str, line_mode: str, line_color: str = 'black', line_width: int = 1, scatterName: str = "", max_points: int = None, decimation: str = "minmax"):
         """
         Creates a Scatter plot for the given varName at iterPos.
+
+        With max_points (at least 4) the frame is decimated ("minmax" or "lttb") to at
+        most max_points points. With "minmax", about twice the plot width in pixels keeps
+        it visually lossless, "lttb" may drop the extrema.
         """
         x_data = self.data[dimName].values
         y_data = self.data[varName].isel({iterName: iterPos}).values
 
+        if max_points is not None:
+            x_data, y_data = _decimate(x_data, y_data, max_points, decimation)
+            x_data, y_data = (x_data if x_data.ndim == 1 else x_data[0]), y_data[0]
+
+        return self._trace(x_data, y_data, varName, line_mode, line_color, line_width, scatterName)
+
+    def _trace(self, x_data, y_data, varName: str, line_mode: str, line_color: str = 'black', line_width: int = 1, scatterName: str = ""):
+
         # Choose default line mode
         if line_mode not in ['lines', 'lines+markers', 'markers']:
             line_mode = 'markers'
@@ -102,13 +425,13 @@ class NcView:
 
         return scatter
 
-    def frame(self,  iterPos: int, dimMin: float, dimMax: float, varName: str = 'u', dimName: str = 'x', iterName: str = 't', line_mode: str = 'markers', line_color: str = 'black', line_width: int = 1 ,details: bool = True, show: bool = True):
+    def frame(self,  iterPos: int, dimMin: float, dimMax: float, varName: str = 'u', dimName: str = 'x', iterName: str = 't', line_mode: str = 'markers', line_color: str = 'black', line_width: int = 1 ,details: bool = True, show: bool = True, max_points: int = None, decimation: str = "minmax"):
         """
-        Frame of varName at iterPos
+        Frame of varName at iterPos, decimated to max_points points when given.
         """
         fig = go.Figure()
 
-        fig.add_trace(self.scatter(iterPos, varName, dimName, iterName, line_mode, line_color, line_width))
+        fig.add_trace(self.scatter(iterPos, varName, dimName, iterName, line_mode, line_color, line_width, max_points=max_points, decimation=decimation))
 
 
         iter_value = self.data[iterName].values.tolist()[iterPos]
@@ -180,7 +503,7 @@ class NcView:
 
         return fig
     
-    def frameComparison(self,  iterPos: int, dimMin: float, dimMax: float, framesList: list, varName: str = 'u', dimName: str = 'x', iterName: str = 't', line_mode: str = 'markers', line_color: str = 'black', line_width: int = 1 ,details: bool = True):
+    def frameComparison(self,  iterPos: int, dimMin: float, dimMax: float, framesList: list, varName: str = 'u', dimName: str = 'x', iterName: str = 't', line_mode: str = 'markers', line_color: str = 'black', line_width: int = 1 ,details: bool = True, show: bool = True):
         """
         Frames comparison beetwen ncfile an the frames includes in the framesList by this object:
 
@@ -201,33 +524,67 @@ class NcView:
         for frame in framesList:
             fig.add_trace(_scatter(frame["ncfile_path"], frame["iterPos"], frame["varName"], frame["dimName"], frame["iterName"], frame["line_mode"], frame["line_color"], line_width, frame["varNameInPlot"]))
 
-
-        fig.show()
+        if show:
+            fig.show()
 
         return fig
 
-    def evolution(self, iterPosInit: int, varName: str = 'u', dimName: str = 'x', iterName: str = 't', line_mode: str = 'markers'):
+    def _frames(self, positions, varName: str, dimName: str, iterName: str, max_points: int = None, decimation: str = "minmax"):
+        """
+        (x, y) of the frames of varName at positions, read block_size frames at a time
+        and decimated one block at once. x is None when the frame keeps the whole grid.
+        """
+        x_data = self.data[dimName].values
+        var = self.data[varName]
+
+        for start in range(0, len(positions), self.block_size):
+            block = var.isel({iterName: positions[start:start + self.block_size]}).transpose(iterName, ...).values
+            X, Y = _decimate(x_data, block, max_points, decimation)
+            yield from zip(X if X.ndim == 2 else [None] * len(Y), Y)
+
+    def evolution(self, iterPosInit: int, varName: str = 'u', dimName: str = 'x', iterName: str = 't', line_mode: str = 'markers', max_points: int = None, decimation: str = "minmax", max_frames: int = None, show: bool = True):
         """
         Evolution plot from iterInit to the end of iterDomain.
+
+        On large outputs every frame can be decimated to max_points points ("minmax"
+        keeps the extrema of every bucket, "lttb" the largest triangles and may drop
+        the extrema) and the
+        animation thinned to max_frames evenly spaced frames, the last one included.
+
+        x is stored once, in the first trace, and every frame only carries its y as
+        float32 (x too when decimated), serialized as base64 typed arrays. With
+        show=False the figure is only returned, e.g. for export().
         """
-        iterDomain = self.data[iterName].values.tolist()[iterPosInit:]
+        positions = np.arange(self.data.sizes[iterName])[iterPosInit:]
+        if max_frames is not None and len(positions) > max_frames:
+            positions = positions[np.unique(np.linspace(0, len(positions) - 1, max(1, max_frames)).round().astype(int))]
 
-        fig = go.Figure(data=[self.scatter(iterPosInit, varName, dimName, iterName, line_mode)])
+        iterDomain = self.data[iterName].values[positions].tolist()
+
+        traces = [
+            go.Scatter(y=y_data.astype(np.float32)) if x_data is None else go.Scatter(x=x_data.astype(np.float32), y=y_data.astype(np.float32))
+            for x_data, y_data in self._frames(positions, varName, dimName, iterName, max_points, decimation)
+        ]
+
+        first = traces[0]
+        x_first = self.data[dimName].values if first.x is None else first.x
+        fig = go.Figure(data=[self._trace(x_first, first.y, varName, line_mode)])
 
         frames = [
             go.Frame(
-                data=[self.scatter((iterPosInit + iterPosRel), varName, dimName, iterName, line_mode)],
+                data=[trace],
                 name=str(iterValue)
             )
-            for iterPosRel, iterValue in enumerate(iterDomain)
+            for trace, iterValue in zip(traces, iterDomain)
         ]
 
         fig.update(frames=frames)
 
         eps_y = 0.1
+        y_min, y_max = self.range(varName, iterName)
         fig.update_layout(
             yaxis=dict(
-                range=[self.data[varName].min().values - eps_y, self.data[varName].max().values + eps_y],
+                range=[y_min - eps_y, y_max + eps_y],
                 title=dict(text=varName),
             ),
             xaxis=dict(
@@ -308,12 +665,22 @@ class NcView:
             ]
         )
 
+        if show:
+            fig.show()
 
-        fig.show()
+        return fig
 
     def close(self, remove: bool = False):
-        self.data.close()
+        """
+        Releases the dataset of this view, other views of the file keep theirs. With
+        remove=True the file is closed for every view and deleted.
+        """
+        POOL.release(self.data)
         if remove:
-            os.remove(self.path)
+            POOL.close(self.path)
+            if os.path.isdir(self.path):
+                shutil.rmtree(self.path)
+            else:
+                os.remove(self.path)
 
 
@@ -0,0 +1,132 @@
+import time
+
+class Stats:
+    def __init__(self, hook = None, attributes:bool = False):
+        """
+        Per phase wall times and call counts of a solver run.
+
+        Solvers only time the phases when given a Stats (or profile=True), otherwise
+        they call their functions directly and pay nothing.
+
+        Parameters:
+        -----------
+        hook : function
+            hook(phase, start, stop) called after every timed call with its
+            time.perf_counter() bounds, to feed external profilers.
+
+        attributes : bool
+            Store the summary as global attributes profile_<phase>_time and
+            profile_<phase>_calls of the output file.
+        """
+        self.hook = hook
+        self.attributes = attributes
+        self.times = {}
+        self.calls = {}
+
+    def add(self, phase:str, start:float, stop:float):
+        """
+        Accounts one call of phase from start to stop.
+        """
+        self.times[phase] = self.times.get(phase, 0.0) + (stop - start)
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+        if self.hook is not None:
+            self.hook(phase, start, stop)
+
+    def wrap(self, phase:str, function):
+        """
+        function timed as phase.
+        """
+        clock = time.perf_counter
+        add = self.add
+
+        def timed(*args, **kwargs):
+            start = clock()
+            result = function(*args, **kwargs)
+            add(phase, start, clock())
+            return result
+
+        return timed
+
+    def phase(self, phase:str):
+        """
+        Context manager timing its block as phase.
+        """
+        return _Phase(self, phase)
+
+    def summary(self):
+        """
+        {phase: {"time": total seconds, "calls": number of calls, "mean": seconds per call}}
+        """
+        return {phase: {"time": self.times[phase], "calls": self.calls[phase], "mean": self.times[phase] / self.calls[phase]} for phase in self.times}
+
+    def to_attrs(self):
+        """
+        Summary as flat global attributes.
+        """
+        attrs = {}
+        for phase in self.times:
+            attrs[f"profile_{phase}_time"] = self.times[phase]
+            attrs[f"profile_{phase}_calls"] = self.calls[phase]
+        return attrs
+
+    def __repr__(self):
+        lines = [f"{'phase':<12}{'calls':>10}{'time (s)':>12}{'mean (s)':>12}"]
+        for phase, row in self.summary().items():
+            lines.append(f"{phase:<12}{row['calls']:>10}{row['time']:>12.4f}{row['mean']:>12.3e}")
+        return "\n".join(lines)
+
+class _Phase:
+    def __init__(self, stats:Stats, phase:str):
+        self.stats = stats
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stats.add(self.phase, self.start, time.perf_counter())
+        return False
+
+class _Disabled:
+    """
+    Stand-in of Stats when profiling is off: wrap returns the function itself.
+    """
+    hook = None
+    attributes = False
+
+    def wrap(self, phase:str, function):
+        return function
+
+    def phase(self, phase:str):
+        return _NULL_PHASE
+
+    def __bool__(self):
+        return False
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_PHASE = _NullPhase()
+DISABLED = _Disabled()
+
+def stats_for(profile):
+    """
+    Stats of a solver run from its profile argument: None or False disables profiling,
+    True creates a Stats, a Stats is used as given.
+    """
+    if isinstance(profile, Stats):
+        return profile
+    return Stats() if profile else DISABLED
+
+def write_attrs(stats, ncf):
+    """
+    Stores the summary of stats as global attributes of the output when asked.
+    Call it before the output is closed.
+    """
+    if stats and stats.attributes:
+        ncf.addAttrs(stats.to_attrs())
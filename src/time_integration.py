@@ -0,0 +1,127 @@
+import numpy as np
+
+# Strong stability preserving Runge-Kutta methods in Shu-Osher form: every stage is a
+# forward Euler step blended with the state at the start of the step,
+#     u <- alpha * u^n + (1 - alpha) * (u + dt * L(t^n + c * dt, u))
+# with one (alpha, c) pair per stage.
+_SCHEMES = {
+    "euler": ((0, 0),),
+    "ssprk2": ((0, 0), (1 / 2, 1)),
+    "ssprk3": ((0, 0), (3 / 4, 1), (1 / 3, 1 / 2)),
+}
+
+class SSPRK:
+    def __init__(self, rhs, u, method:str = "ssprk3"):
+        """
+        Method of lines driver for u_t = L(t, u).
+
+        Parameters:
+        -----------
+        rhs : function
+            Spatial operator rhs(t, u, out), writes L(t, u) into out without allocating.
+
+        u : array
+            State template, every stage buffer is preallocated with its shape and dtype.
+
+        method : str
+            "euler", "ssprk2" or "ssprk3".
+        """
+        if (method not in _SCHEMES):
+            raise RuntimeError(f"Unknown time integrator '{method}' - use 'euler', 'ssprk2' or 'ssprk3'")
+
+        self.rhs = rhs
+        self.method = method
+        self.stages = _SCHEMES[method]
+        self.un = np.empty_like(u) if len(self.stages) > 1 else None
+        self.L = np.empty_like(u)
+
+    def step(self, t:float, u, dt:float):
+        """
+        Advances u in place from t to t + dt.
+        """
+        L = self.L
+        if (self.un is not None):
+            np.copyto(self.un, u)
+
+        for alpha, c in self.stages:
+            self.rhs(t + c * dt, u, L)
+            L *= dt
+            u += L
+            if (alpha):
+                u *= 1 - alpha
+                np.multiply(self.un, alpha, out=L)
+                u += L
+
+        return u
+
+    def integrate(self, u, t0:float, T:float, dt:float = None, stable_dt = None, times = None, sns:int = 1, callback = None):
+        """
+        Advances u in place from t0 to T.
+
+        Steps are shortened so that every output time and T are hit exactly.
+
+        Parameters:
+        -----------
+        u : array
+            The state, with the shape given to the constructor.
+
+        t0, T : float
+            Time interval.
+
+        dt : float
+            Fixed time step.
+
+        stable_dt : function
+            stable_dt(u) returns the CFL-adaptive time step of the current state
+            (np.inf if any step is stable). Exactly one of dt and stable_dt is given.
+
+        times : array of float
+            Output times in (t0, T]. By default every sns steps and T.
+
+        sns : int
+            Snapshot step when no output times are given.
+
+        callback : function
+            callback(t, u) called at every output time.
+
+        Returns:
+        --------
+        int
+            The number of steps taken.
+        """
+        if ((dt is None) == (stable_dt is None)):
+            raise RuntimeError("Give either a fixed dt or a stable_dt function")
+
+        if (dt is not None and dt <= 0):
+            raise RuntimeError("Time step must be positive")
+
+        if (times is None):
+            targets = [T]
+        else:
+            times = np.asarray(times, dtype=float)
+            targets = np.unique(times[(times > t0) & (times <= T)]).tolist()
+
+        t = t0
+        k = 0
+        for target in targets:
+            while t < target:
+                h = dt if dt is not None else stable_dt(u)
+                if (h <= 0):
+                    raise RuntimeError(f"Non positive time step {h} at t = {t}")
+
+                # Last step of the interval lands on the target, without leaving a
+                # round-off sliver behind
+                last = t + h * (1 + 1e-10) >= target
+                if (last):
+                    h = target - t
+                self.step(t, u, h)
+                t = target if last else t + h
+                k += 1
+
+                if (callback is not None and times is None and (k % sns == 0 or t == T)):
+                    callback(t, u)
+
+            if (callback is not None and times is not None):
+                callback(t, u)
+
+        return k
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules of src are imported flat, as the examples do
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+import advection
+
+
+def observed_orders(errors):
+    errors = np.array(errors)
+    return np.log2(errors[:-1] / errors[1:])
+
+
+@pytest.mark.parametrize("method_name, order", [("cir", 1), ("lax_friedichs", 1), ("lax_wendroff", 2), ("beam_warming", 2), ("fromm", 2)])
+def test_one_step_methods(method_name, order):
+    f = lambda x: np.sin(2 * np.pi * x)
+
+    errors = []
+    for nx in (100, 200, 400):
+        result = advection._one_step_method(method_name, 0, 1, nx, 1.0, 0.8, 1.0, f, backend="memory", boundary="periodic").arrays()
+        exact = f(result["x"] - 1.0)
+        errors.append(np.abs(result["u"][-1] - exact).max())
+
+    assert observed_orders(errors) == pytest.approx(order, abs=0.05)
+
+
+@pytest.mark.parametrize("space, order", [("upwind1", 1), ("upwind2", 2), ("upwind3", 3), ("centered2", 2)])
+def test_method_of_lines(space, order):
+    f = lambda x: np.exp(-200 * (x - 0.3)**2)
+
+    errors = []
+    for nx in (201, 401, 801):
+        result = advection.method_of_lines(0, 1, nx, 0.3, 0.5, 1.0, f, sns=10**9, space=space, backend="memory").arrays()
+        exact = f(result["x"] - 0.3)
+        errors.append(np.abs(result["u"][-1] - exact).max())
+
+    # upwind1 is still approaching its asymptotic order on these grids
+    assert observed_orders(errors)[-1] == pytest.approx(order, abs=0.15)
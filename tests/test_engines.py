@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+import advection
+import advection2d
+
+
+def pulse(x):
+    return np.exp(-100 * (x - 0.3)**2)
+
+def run(method_name, **kwargs):
+    options = dict(x0=0, xf=1, nx=120, T=0.5, cfl=0.9, a=1.3, f=pulse, sns=3, backend="memory")
+    options.update(kwargs)
+    return advection._one_step_method(method_name, **options).arrays()
+
+
+@pytest.mark.parametrize("method_name", ["cir", "lax_friedichs", "lax_wendroff", "beam_warming", "fromm"])
+@pytest.mark.parametrize("engine", ["matrix", "jump", "fft"])
+def test_periodic_engines_match_stencil(method_name, engine):
+    expected = run(method_name, boundary="periodic")
+    result = run(method_name, boundary="periodic", engine=engine)
+
+    np.testing.assert_array_equal(result["t"], expected["t"])
+    np.testing.assert_allclose(result["u"], expected["u"], rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("method_name", ["cir", "lax_wendroff", "beam_warming"])
+@pytest.mark.parametrize("engine", ["matrix", "jump"])
+@pytest.mark.parametrize("a", [1.3, -1.3])
+def test_dirichlet_engines_match_stencil(method_name, engine, a):
+    expected = run(method_name, a=a)
+    result = run(method_name, a=a, engine=engine)
+
+    np.testing.assert_allclose(result["u"], expected["u"], rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("engine", ["stencil", "matrix", "jump"])
+def test_ensemble_matches_single_runs(engine):
+    fs = [pulse, lambda x: np.sin(2 * np.pi * x)]
+    a = [1.3, 0.7]
+    result = advection.ensemble("lax_wendroff", 0, 1, 120, 0.5, 0.9, a, fs, sns=3, engine=engine, backend="memory", boundary="periodic").arrays()
+
+    for member, (f, speed) in enumerate(zip(fs, a)):
+        # Same dt as the ensemble, which takes it from the fastest member
+        expected = run("lax_wendroff", a=speed, cfl=0.9 * speed / max(a), f=f, boundary="periodic")
+        np.testing.assert_allclose(result["t"], expected["t"], rtol=1e-15)
+        np.testing.assert_allclose(result["u"][..., member], expected["u"], rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("method_name", ["lax_wendroff", "beam_warming"])
+def test_strang_matrix_matches_stencil(method_name):
+    f = lambda X, Y: np.exp(-50 * ((X - 0.3)**2 + (Y - 0.4)**2))
+    runs = [advection2d._strang_method(method_name, 0, 1, 40, 0, 1, 30, 0.3, 0.9, 1.0, 0.6, f, sns=2, engine=engine, backend="memory").arrays()
+            for engine in ("stencil", "matrix")]
+
+    np.testing.assert_allclose(runs[1]["u"], runs[0]["u"], rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("engine", ["stencil", "matrix", "jump", "fft"])
+def test_last_snapshot_lands_on_T(engine):
+    result = run("lax_wendroff", engine=engine, boundary="periodic", sns=1)
+
+    assert result["t"][-1] == 0.5
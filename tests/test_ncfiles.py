@@ -0,0 +1,43 @@
+import netCDF4 as nc
+import numpy as np
+import pytest
+
+import advection
+from ncfiles import NcFile
+
+
+def pulse(x):
+    return np.exp(-100 * (x - 0.3)**2)
+
+
+@pytest.mark.parametrize("layout", [None, {"time_first": True, "zlib": True}])
+def test_asynchronous_output_matches_synchronous(tmp_path, layout):
+    outputs = []
+    for asynchronous in (False, True):
+        full_path = advection._one_step_method("lax_wendroff", 0, 1, 150, 0.6, 0.9, 1.0, pulse, sns=2, path_to_save=str(tmp_path / str(asynchronous)), asynchronous=asynchronous, layout=layout)
+        with nc.Dataset(full_path) as ncf:
+            outputs.append((ncf["t"][:].data, ncf["u"][:].data, ncf["u"].actual_range))
+
+    for expected, result in zip(*outputs):
+        np.testing.assert_array_equal(result, expected)
+
+
+def test_writer_error_is_raised_by_every_later_call(tmp_path):
+    ncf = NcFile(str(tmp_path / "output"), buffer_size=2, asynchronous=True)
+    ncf.addCoords({'x': np.arange(4.0)})
+    ncf.addVars(['u'])
+
+    ncf.save(0, {"u": np.zeros(4)})
+    # Wrong shape, fails in the writer thread
+    ncf.save(1, {"u": np.zeros(5)})
+    with pytest.raises(RuntimeError, match="writer failed"):
+        ncf.join()
+
+    with pytest.raises(RuntimeError, match="writer failed"):
+        ncf.save(2, {"u": np.zeros(4)})
+    with pytest.raises(RuntimeError, match="writer failed"):
+        ncf.flush()
+    with pytest.raises(RuntimeError, match="writer failed"):
+        ncf.close()
+    with pytest.raises(RuntimeError, match="writer failed"):
+        ncf.close()
@@ -0,0 +1,57 @@
+import netCDF4 as nc
+import numpy as np
+import pytest
+
+import advection
+
+
+class Interrupted(Exception):
+    pass
+
+def pulse(x):
+    return np.exp(-100 * (x - 0.3)**2)
+
+def interrupted_after(calls):
+    """
+    pulse, raising once it has been called calls times (the Dirichlet boundaries call it every step).
+    """
+    count = 0
+    def f(x):
+        nonlocal count
+        count += 1
+        if (count > calls):
+            raise Interrupted()
+        return pulse(x)
+    return f
+
+def run(path, f=pulse, **kwargs):
+    return advection._one_step_method("lax_wendroff", 0, 1, 150, 0.6, 0.9, 1.0, f, sns=4, path_to_save=str(path), **kwargs)
+
+def read(full_path):
+    with nc.Dataset(full_path) as ncf:
+        return ncf["t"][:].data, ncf["u"][:].data, dict(ncf["u"].__dict__)
+
+
+@pytest.mark.parametrize("checkpoint", [0, 3])
+def test_resume_reproduces_uninterrupted_run(tmp_path, checkpoint):
+    t, u, attrs = read(run(tmp_path / "full", checkpoint=checkpoint))
+
+    with pytest.raises(Interrupted):
+        run(tmp_path / "resumed", f=interrupted_after(150), checkpoint=checkpoint)
+    t_resumed, u_resumed, attrs_resumed = read(run(tmp_path / "resumed", resume=True, checkpoint=checkpoint))
+
+    np.testing.assert_array_equal(t_resumed, t)
+    if (checkpoint):
+        # Restarted from the full precision state
+        np.testing.assert_array_equal(u_resumed, u)
+    else:
+        # Restarted from the last f4 snapshot
+        np.testing.assert_allclose(u_resumed, u, rtol=0, atol=1e-6)
+    np.testing.assert_allclose(attrs_resumed["actual_range"], attrs["actual_range"], rtol=0, atol=1e-6)
+
+
+def test_resume_rejects_other_parameters(tmp_path):
+    run(tmp_path)
+
+    with pytest.raises(RuntimeError, match="stored T"):
+        advection._one_step_method("lax_wendroff", 0, 1, 150, 0.3, 0.9, 1.0, pulse, sns=4, path_to_save=str(tmp_path), resume=True)